@@ -0,0 +1,92 @@
+"""Benchmarks of kernelized matrix and kernel trick regressors"""
+import warnings
+import numpy as np
+from sklearn.base import clone
+from sklearn.exceptions import ConvergenceWarning
+from sklearn.linear_model import Ridge, Lasso
+import rfml_localization.core as rfcore
+from .common import simulate, split, KERNEL_SCALES
+
+#penalty of each solver (Lasso only at sizes that converge in seconds)
+SOLVERS = {'ridge': lambda: Ridge(alpha=1.83e-06), 'lasso': lambda: Lasso(alpha=1e-4, max_iter=2000)}
+LASSO_MAX_RUNS = 1000
+#iterations are fixed, timings do not depend on convergence
+warnings.filterwarnings('ignore', category=ConvergenceWarning)
+
+
+class KMatrix:
+    """`HFF_k_matrix` of training data, by number of runs and kernel"""
+    params = ([1000, 4000], ['laplacian', 'rbf'])
+    param_names = ['n_runs', 'kernel']
+
+    def setup(self, n_runs, kernel):
+        self.X, _, self.n_meas_array = simulate(n_runs)
+        self.varMs = np.array(list(KERNEL_SCALES.values()))
+
+    def time_HFF_k_matrix(self, n_runs, kernel):
+        rfcore.HFF_k_matrix(fml=self.X, kernel=kernel, num_meas_array=self.n_meas_array, varMs=self.varMs)
+
+    def peakmem_HFF_k_matrix(self, n_runs, kernel):
+        rfcore.HFF_k_matrix(fml=self.X, kernel=kernel, num_meas_array=self.n_meas_array, varMs=self.varMs)
+
+
+class SklearnKTRegressor:
+    """`sklearn_kt_regressor` fit, predict and accuracy, by number of runs,
+    kernel and solver"""
+    params = ([1000, 4000], ['laplacian', 'rbf'], ['ridge', 'lasso'])
+    param_names = ['n_runs', 'kernel', 'solver']
+    timeout = 600
+
+    def setup(self, n_runs, kernel, solver):
+        if solver == 'lasso' and n_runs > LASSO_MAX_RUNS:
+            raise NotImplementedError('lasso only benchmarked up to {} runs'.format(LASSO_MAX_RUNS))
+        X, y, n_meas_array = simulate(n_runs)
+        self.X_train, self.y_train, self.X_test, self.y_test = split(X, y)
+        self.model = rfcore.sklearn_kt_regressor(skl_model=SOLVERS[solver](), skl_kernel=kernel, n_kernels=3,
+                                                 n_meas_array=n_meas_array, **KERNEL_SCALES)
+        self.fitted = clone(self.model).fit(self.X_train, self.y_train)
+
+    def time_fit(self, n_runs, kernel, solver):
+        self.model.fit(self.X_train, self.y_train)
+
+    def peakmem_fit(self, n_runs, kernel, solver):
+        self.model.fit(self.X_train, self.y_train)
+
+    def time_predict(self, n_runs, kernel, solver):
+        self.fitted.predict(self.X_test)
+
+    def peakmem_predict(self, n_runs, kernel, solver):
+        self.fitted.predict(self.X_test)
+
+    def track_mse_EucDistance(self, n_runs, kernel, solver):
+        return rfcore.mse_EucDistance(self.y_test, self.fitted.predict(self.X_test))
+    track_mse_EucDistance.unit = 'meters'
+
+
+class GlmnetKTRegressor:
+    """`glmnet_kt_regressor` fit, predict and accuracy, by number of runs,
+    kernel and solver (elastic net mixing, 0-ridge, 1-lasso)"""
+    params = ([1000], ['laplacian', 'rbf'], [0, 1])
+    param_names = ['n_runs', 'kernel', 'glm_alpha']
+    timeout = 600
+
+    def setup(self, n_runs, kernel, glm_alpha):
+        X, y, n_meas_array = simulate(n_runs)
+        self.X_train, self.y_train, self.X_test, self.y_test = split(X, y)
+        params = dict(glm_alpha=glm_alpha, lambdau=1e-3, skl_kernel=kernel, n_kernels=3,
+                      n_meas_array=n_meas_array, glmnet_args={'family': 'mgaussian'}, **KERNEL_SCALES)
+        self.model = rfcore.glmnet_kt_regressor(**params)
+        self.fitted = rfcore.glmnet_kt_regressor(**params).fit(self.X_train, self.y_train)
+
+    def time_fit(self, n_runs, kernel, glm_alpha):
+        self.model.fit(self.X_train, self.y_train)
+
+    def peakmem_fit(self, n_runs, kernel, glm_alpha):
+        self.model.fit(self.X_train, self.y_train)
+
+    def time_predict(self, n_runs, kernel, glm_alpha):
+        self.fitted.predict(self.X_test)
+
+    def track_mse_EucDistance(self, n_runs, kernel, glm_alpha):
+        return rfcore.mse_EucDistance(self.y_test, self.fitted.predict(self.X_test))
+    track_mse_EucDistance.unit = 'meters'
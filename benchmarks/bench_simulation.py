@@ -0,0 +1,28 @@
+"""Benchmarks of `RFchannel` simulation"""
+from .common import channel, SEED_XMODEL
+
+
+class GenerateXmodel:
+    """Measurements of fixed locations, by number of runs, sensors and
+    measurement types (0-tdoa, 2-aoa, 6-tdoa/drss/aoa)"""
+    params = ([10000, 100000], [6, 12], [0, 2, 6])
+    param_names = ['n_runs', 'n_rx', 'meas_flag']
+    timeout = 300
+
+    def setup(self, n_runs, n_rx, meas_flag):
+        self.rf = channel(n_runs, n_rx)
+
+    def time_generate_Xmodel(self, n_runs, n_rx, meas_flag):
+        self.rf.generate_Xmodel(meas_flag=meas_flag, seed=SEED_XMODEL)
+
+    def peakmem_generate_Xmodel(self, n_runs, n_rx, meas_flag):
+        self.rf.generate_Xmodel(meas_flag=meas_flag, seed=SEED_XMODEL)
+
+
+class GenerateRxTxlocations:
+    """Random locations, by number of runs"""
+    params = [10000, 1000000]
+    param_names = ['n_runs']
+
+    def time_generate_RxTxlocations(self, n_runs):
+        channel(n_runs)
@@ -0,0 +1,29 @@
+"""Synthetic data of `RFchannel` with fixed seeds, shared by benchmarks"""
+import numpy as np
+from rfml_localization.RFsimulation import RFchannel
+
+#seeds of sensor layouts, locations and measurements
+SEED_LAYOUT, SEED_LOC, SEED_XMODEL = 0, 1, 2
+#kernel scales of the kernel trick examples (rbf, 3 measurement types)
+KERNEL_SCALES = dict(kernel_s0=1.13e-06, kernel_s1=2.07e-03, kernel_s2=10)
+
+def sensor_locs(n_rx, areaWL=np.array([20,60])):
+    """Returns fixed random layout of `n_rx` sensors, (2, n_rx, 1)"""
+    return np.random.default_rng(SEED_LAYOUT).uniform(0, 1, (2, n_rx, 1))*areaWL[:, np.newaxis, np.newaxis]
+
+def channel(n_runs, n_rx=6):
+    """Returns `RFchannel` with (fixed) locations of `n_runs` runs"""
+    return RFchannel().generate_RxTxlocations(n_rx=n_rx, n_runs=n_runs, sensor_locs=sensor_locs(n_rx),
+                                              seed=SEED_LOC)
+
+def simulate(n_runs, n_rx=6, meas_flag=6):
+    """Returns measurements `X`, Tx locations `y` and `n_meas_array` of
+    `n_runs` runs"""
+    rf = channel(n_runs, n_rx).generate_Xmodel(meas_flag=meas_flag, seed=SEED_XMODEL)
+    return rf.X_model, rf.rxtx_locs[:, 0, :].T, rf.n_meas_array
+
+def split(X, y, test_size=0.2):
+    """Returns fixed (last `test_size` fraction held out) train/test split,
+    runs are independent draws"""
+    n_train = int(len(y)*(1-test_size))
+    return X[:n_train], y[:n_train], X[n_train:], y[n_train:]
@@ -3,11 +3,71 @@
 __all__ = ['RFchannel']
 
 # Cell
+import os
 import numpy as np
 import matplotlib.pyplot as plt
-from scipy.special import comb
-from itertools import combinations
+from functools import lru_cache
+from concurrent.futures import ProcessPoolExecutor
 from sklearn.utils import check_array
+from .profiling import _tic, _toc, _timed
+
+# Cell
+@lru_cache(maxsize=None)
+def _pair_indices(num_rx):
+    """Returns (read-only) indices of sensor pairs, (rx1,rx2), (rx1,rx3),
+    ... (rx(n-1),rxn), same order as `itertools.combinations`, cached
+    per number of sensors"""
+    pairs = np.triu_indices(num_rx, k=1)
+    for idx in pairs:
+        idx.setflags(write=False)
+    return pairs
+
+def _pair_diff(vals, out=None):
+    """Differential measurements of pairs of sensors (see `_pair_indices`)
+    of absolute measurements `vals` ([...] x num_rx x num_runs, leading
+    axes kept), returned as C-contiguous [...] x [num_runs] x [num_rx
+    choose 2] array or written into `out` (e.g., columns of a feature
+    matrix)"""
+    i, j = _pair_indices(vals.shape[-2])
+    #gather contiguous rows of each sensor, one transposed copy into runs x pairs
+    if out is None:
+        return np.ascontiguousarray(np.swapaxes(vals[..., i, :] - vals[..., j, :], -1, -2))
+    out[...] = np.swapaxes(vals[..., i, :] - vals[..., j, :], -1, -2)
+    return out
+
+def _child_seeds(seed, n):
+    """Returns `n` seeds of independent streams if `seed` is a
+    `np.random.SeedSequence` (children derived from its spawn key
+    without spawning, so repeated calls agree), else `n` copies of
+    `seed` (legacy behavior, same stream reused)"""
+    if isinstance(seed, np.random.SeedSequence):
+        return [np.random.SeedSequence(seed.entropy, spawn_key=seed.spawn_key+(i,), pool_size=seed.pool_size)
+                for i in range(n)]
+    return [seed]*n
+
+#measurement types (0-tdoa, 1-rss, 2-aoa) of each meas_flag
+_MEAS_TYPES = {0: (0,), 1: (1,), 2: (2,), 3: (0, 1), 4: (0, 2), 5: (1, 2), 6: (0, 1, 2)}
+
+def _meas_layout(meas_flag, diff_array, num_rx):
+    """Returns measurement types (0-tdoa, 1-rss, 2-aoa) of `meas_flag`
+    and number of (differential) measurements of each, i.e., columns of
+    `X_model` (see `generate_Xmodel`)"""
+    if meas_flag not in _MEAS_TYPES: raise ValueError('bad meas_flag')
+    meas_types = _MEAS_TYPES[meas_flag]
+    n_pairs = num_rx*(num_rx-1)//2
+    return meas_types, [n_pairs if diff_array[m] else num_rx for m in meas_types]
+
+#default arguments of generate_Xmodel, for methods passing them on
+_XMODEL_ARGS = {'ch_delay_flag': 1, 'ch_gain_flag': 1, 'ch_angle_flag': 1, 'meas_flag': 6,
+                'diff_array': [1,0,0], 'seed': None, 'max_bytes': 2**28}
+
+def _check_out(out, shape):
+    """Returns `out` if it has `shape`, new array of `shape` if None"""
+    if out is None:
+        return np.empty(shape)
+    if out.shape != shape:
+        raise ValueError('out has shape {}, expected {}'.format(out.shape, shape))
+    return out
 
 # Cell
 class RFchannel:
@@ -92,6 +152,8 @@ class RFchannel:
         self.Xsigma=Xsigma
         self.Wavelength=Wavelength
         self.AoAsigma=AoAsigma
+        #deterministic part of measurements, see `draw_Xmodel`
+        self._ideal_cache = None
 
     def generate_RxTxlocations(self, n_rx=6, areaWL=np.array([20,60]), n_runs=1000,
                                sensor_locs= np.array([[[6.3], [14.1], [7.2], [14.5], [7.5], [13.5]],[[15.3], [15.1], [30.1], [30.5], [44.9], [44.5]]]),
@@ -131,8 +193,9 @@ class RFchannel:
         >    - Flag on generating random Tx location on evenly spaced
         >    grid (1m x 1m spacing).  Default is random, non-grid.
         >
-        >__seed__ : integer, default=None
-        >- set for reprodducible results
+        >__seed__ : integer or SeedSequence, default=None
+        >- set for reprodducible results, a `np.random.SeedSequence`
+        >    gives independent streams to each random quantity
 
         __Returns__
 
@@ -154,8 +217,8 @@ class RFchannel:
                 raise ValueError('num_runs is not {dict_size} for dictionary making'.format(dict_size=repr(dict_size)))
             if rxtx_flag != 3:
                 raise ValueError('RxTx_flag not matching Dict_flag for dictionary making')
-            #concatenate random rx points which will be overwritten based on flag
-            rxtxlocations = np.concatenate((rxtxlocations,np.random.default_rng(seed).uniform(0,1,(grid_dim, n_rx, n_runs))),axis=1)
+            #append rx points, set to sensor_locs below (no random draw needed)
+            rxtxlocations = np.concatenate((rxtxlocations,np.zeros((grid_dim, n_rx, n_runs))),axis=1)
 
         #generate locations randomly
         else:
@@ -195,7 +258,7 @@ class RFchannel:
 
         return self
 
-    def calculate_Rxxdelay(self, ch_delay_flag = 1, tdoa_flag = 1, seed=None):
+    def calculate_Rxxdelay(self, ch_delay_flag = 1, tdoa_flag = 1, seed=None, max_bytes=2**28):
         """
         Calculates relative delay of wireless signals from a
         transmitter (Tx) to different receivers (Rx) based on given Rx
@@ -237,8 +300,14 @@ class RFchannel:
         >- List of time-related propagation parameters in integers
         >    (nanosecond units)
         >
-        >__seed__ : integer, default=None
-        >- set for reprodducible results
+        >__seed__ : integer or SeedSequence, default=None
+        >- set for reprodducible results, a `np.random.SeedSequence`
+        >    gives independent streams to each random quantity
+        >
+        >__max_bytes__ : integer, default=2**28
+        >- memory budget (bytes) of multipath simulation, runs are
+        >    simulated in chunks so peak memory does not depend on
+        >    num_runs
 
         __Returns__
 
@@ -254,59 +323,16 @@ class RFchannel:
             1987, doi: 10.1109/JSAC.1987.1146527.
 
         """
-        #get basic parameters inherent in rxtx_locations
-        rxtx_locations = self.rxtx_locs
-        poissonarray = [self.maxSpreadT, self.PoissonInvLambda,
-                        self.Poissoninvlambda, self.PoissonGamma,
-                        self.Poissongamma]
-        _, num_rx, num_runs = rxtx_locations.shape
-        num_rx -= 1 #2nd dimension has one Tx and rest Rx
-
-        #get Tx positions
-        tx_vec=np.expand_dims(rxtx_locations[:,0,:],axis=1)
-        #get Rx positions
-        rx_array=rxtx_locations[:,1:,:]
-        #note that we (currently) assume that first entry is transmitter
-        #calculate absolute delays from Tx to each Rx (convert from meters to ns)
-        abs_delay = np.linalg.norm(tx_vec-rx_array, axis=0)*10/3
-        offsets=np.zeros(abs_delay.shape)
-
-        if (ch_delay_flag):
-            #add in Poisson delays and scale using Rayleigh values
-            maxspreadt,pIL, pil, pG, pg = poissonarray
-            #set up typical cluster, ray numbers based on provide values
-            num_clstrs = maxspreadt // pIL
-            if num_clstrs == 0: num_clstrs=1
-            num_rays = (2*pIL) // pil
-            clstr_idx = np.arange(0, num_clstrs)
-            ray_idx = np.arange(0, num_rays)
-            #generate cluster and ray timing
-            clstr_times = np.expand_dims(np.random.default_rng(seed).gamma(clstr_idx,pIL*np.ones((num_rx,num_runs,1))),axis=3)
-            ray_times = np.random.default_rng(seed).gamma(ray_idx,pil*np.ones((num_rx,num_runs,num_clstrs, num_rays)))
-
-            #get path gains for cluster/ray combos
-            clstr_ray_gains = np.random.default_rng(seed).rayleigh(np.multiply(np.exp(-clstr_times/pG),np.exp(-ray_times/pg))/2)
-
-            #reshape to make easier to index, find largest path gain
-            clstr_ray_gains = clstr_ray_gains.reshape(num_rx, num_runs, num_rays*num_clstrs)
-            times_matrix_idx = np.expand_dims(np.argmax(clstr_ray_gains, axis=2), axis=2)
-            #make it easy to find associated cluster, ray times for biggest path gain
-            clstr_times1 = np.matmul(clstr_times,np.ones((1,num_rays)))
-            #ray_times1 = np.matmul(np.ones((num_clstrs,1)),ray_times)
-            times_matrix = (clstr_times1 + ray_times).reshape(clstr_ray_gains.shape)
-            #get offset
-            offsets = np.take_along_axis(times_matrix,times_matrix_idx,axis=2).squeeze(axis=2)
+        #get Tx to Rx geometry, absolute delays plus multipath offsets
+        _, abs_dist = self._rxtx_geometry()
+        delay_vals = self._meas_vals(0, None, abs_dist, ch_delay_flag, seed, max_bytes)
 
         if (tdoa_flag):
-            #from absolute delays+offsets, get relative delays
-            # so create array to hold values, set abs+offsets, then iterate to get diff
-            rxx_delay = np.zeros((num_runs,comb(num_rx,2,exact=True)))
-            temp = abs_delay+offsets
-            for i,j in zip(range(rxx_delay.shape[1]),combinations(range(num_rx),2)):
-                rxx_delay[:,i]=temp[j[0],:]-temp[j[1],:]
+            #from absolute delays+offsets, get relative delays of all pairs at once
+            rxx_delay = _pair_diff(delay_vals)
         else:
             #return absolute values of time of flight
-            rxx_delay = np.transpose(abs_delay + offsets)
+            rxx_delay = np.transpose(delay_vals)
 
         #save parameters to self
         self.ch_delay_flag = ch_delay_flag
@@ -354,8 +380,9 @@ class RFchannel:
         >    received power in dB (log-normal Gaussian RV), Wavelength
         >    is of RF signal emanating from Tx source in Hz
         >
-        >__seed__ : integer, default=None
-        >- set for reprodducible results
+        >__seed__ : integer or SeedSequence, default=None
+        >- set for reprodducible results, a `np.random.SeedSequence`
+        >    gives independent streams to each random quantity
 
         __Returns__
 
@@ -369,39 +396,14 @@ class RFchannel:
             and Practice by IEEE Press, Inc. Prentic Hall ISBN:
             0-7803-1167-1. Chapters 3 and 4
         """
-        #get basic parameters inherent in rxtx_locations
-        rxtx_locations = self.rxtx_locs
-        lognormalarray = [self.PathLossN, self.Xsigma,
-                          self.Wavelength]
-        _, num_rx, num_runs = rxtx_locations.shape
-        num_rx -= 1 #2nd dimension has one Tx and rest Rx
-        #
-        tx_vec=np.expand_dims(rxtx_locations[:,0,:],axis=1)
-        rx_array=rxtx_locations[:,1:,:]
-        #note that we (currently) assume that num_tx == 1
-        #calculate absolute distances from Tx to each Rx
-        #measurements stay in meters
-        abs_dist = np.linalg.norm(tx_vec-rx_array, axis=0)
-        #get reference loss in db, normalize d0 to lambda
-        pln, xsigma, wavelength=lognormalarray
-        PLd0=-10*np.log10(wavelength*wavelength/(16*np.pi*np.pi))*np.ones((num_rx,num_runs))
-        offsets=np.zeros(abs_dist.shape)
-
-        # if shadowing flag (or ch_gain_flag)
-        if (ch_gain_flag):
-            #calculate loss based on PL exponent and shadowing factors
-            rssi_vals = PLd0 + 10*pln*np.log10(abs_dist) + np.random.default_rng(seed).normal(scale=xsigma,size=abs_dist.shape)
-        else:
-            #calculate loss based on ideal path loss (free space)
-            rssi_vals = PLd0 + 10*2*np.log10(abs_dist)
+        #get Tx to Rx geometry, absolute received power
+        _, abs_dist = self._rxtx_geometry()
+        rssi_vals = self._meas_vals(1, None, abs_dist, ch_gain_flag, seed)
 
         #return either differential or absolute received signal strength
         if (drss_flag):
-            #from absolute rssi_vals, get relative rss
-            # so create array to hold values, then iterate to get diff
-            rxx_rssi = np.zeros((num_runs,comb(num_rx,2,exact=True)))
-            for i,j in zip(range(rxx_rssi.shape[1]),combinations(range(num_rx),2)):
-                rxx_rssi[:,i]=rssi_vals[j[0],:]-rssi_vals[j[1],:]
+            #from absolute rssi_vals, get relative rss of all pairs at once
+            rxx_rssi = _pair_diff(rssi_vals)
         else:
             rxx_rssi = np.transpose(rssi_vals)
 
@@ -449,8 +451,9 @@ class RFchannel:
         >    which is Laplacian standard deviation of angle of arrival
         >    error in radians of RF signal emanating from Tx source
         >
-        >__seed__ : integer, default=None
-        >- set for reprodducible results
+        >__seed__ : integer or SeedSequence, default=None
+        >- set for reprodducible results, a `np.random.SeedSequence`
+        >    gives independent streams to each random quantity
 
         __Returns__
 
@@ -466,29 +469,13 @@ class RFchannel:
             IEEE Journal on Selected Areas in Communications, vol. 18, no.
             3, pp. 347-360, March 2000, doi: 10.1109/49.840194.
         """
-        #get basic parameters inherent in rxtx_locations
-        rxtx_locations = self.rxtx_locs
-        aoasigma = self.AoAsigma
-        _, num_rx, num_runs = rxtx_locations.shape
-        num_rx -= 1 #2nd dimension has one Tx and rest Rx
-        #
-        tx_vec=np.expand_dims(rxtx_locations[:,0,:],axis=1)
-        rx_array=rxtx_locations[:,1:,:]
-        #note that we (currently) assume that num_tx == 1
-        #calculate angle from Rx to each Tx in radians
-        diff_vec = tx_vec - rx_array
-        abs_aoa = np.arctan2(diff_vec[1,:,:],diff_vec[0,:,:])
-        #
-        if (ch_angle_flag):
-            #calculate angle based on Laplacian
-            abs_aoa = abs_aoa+ np.random.default_rng(seed).laplace(scale=aoasigma,size=abs_aoa.shape)
+        #get Tx to Rx geometry, absolute angles
+        diff_vec, abs_dist = self._rxtx_geometry()
+        abs_aoa = self._meas_vals(2, diff_vec, abs_dist, ch_angle_flag, seed)
 
         if (daoa_flag):
-            #from absolute aoa vals, get relative aoa
-            # so create array to hold values, then iterate to get diff
-            rel_aoa = np.zeros((num_runs,comb(num_rx,2,exact=True)))
-            for i,j in zip(range(rel_aoa.shape[1]),combinations(range(num_rx),2)):
-                    rel_aoa[:,i]=abs_aoa[j[0],:]-abs_aoa[j[1],:]
+            #from absolute aoa vals, get relative aoa of all pairs at once
+            rel_aoa = _pair_diff(abs_aoa)
         else:
             rel_aoa = np.transpose(abs_aoa)
 
@@ -500,8 +487,149 @@ class RFchannel:
 
         return self
 
+    def _rxtx_geometry(self):
+        """Returns Tx minus Rx vectors, [location dims] x [num_rx] x
+        [num_runs], and their norms (Tx to Rx distances in meters),
+        [num_rx] x [num_runs], of self.rxtx_locs"""
+        rxtx_locations = self.rxtx_locs
+        #note that we (currently) assume that first entry is transmitter
+        tx_vec=np.expand_dims(rxtx_locations[:,0,:],axis=1)
+        rx_array=rxtx_locations[:,1:,:]
+        diff_vec = tx_vec - rx_array
+        return diff_vec, np.linalg.norm(diff_vec, axis=0)
+
+    def _settings(self, names, params=None):
+        """Returns channel parameters `names`, from `params` (arrays of
+        settings, shaped [n_settings] x 1 x 1 to broadcast over [num_rx]
+        x [num_runs]) if swept, else from self"""
+        if params is None:
+            params = {}
+        return [np.reshape(params[name], (-1, 1, 1)) if name in params else getattr(self, name)
+                for name in names]
+
+    def _ideal_vals(self, m, diff_vec, abs_dist, ch_flag=1, params=None):
+        """
+        Deterministic part, [num_rx] x [num_runs] (or with leading axes
+        of `abs_dist`, e.g., sensor layouts, or settings swept in
+        `params`), of measurement type `m` of Tx minus Rx vectors
+        `diff_vec` and distances `abs_dist` (see `_rxtx_geometry`):
+
+        - 0 - absolute delays (ns), see `calculate_Rxxdelay`
+        - 1 - mean received power (dB) of path loss, free space if not
+          `ch_flag`, see `calculate_RxxRssi`
+        - 2 - absolute angles (rad), see `calculate_AoA`
+        """
+        if m == 0:
+            #calculate absolute delays from Tx to each Rx (convert from meters to ns)
+            return abs_dist*10/3
+        if m == 1:
+            pln, wavelength = self._settings(('PathLossN', 'Wavelength'), params)
+            num_rx, num_runs = abs_dist.shape[-2:]
+            #get reference loss in db, normalize d0 to lambda
+            PLd0=-10*np.log10(wavelength*wavelength/(16*np.pi*np.pi))*np.ones((num_rx,num_runs))
+            if (ch_flag):
+                #calculate loss based on PL exponent
+                return PLd0 + 10*pln*np.log10(abs_dist)
+            #calculate loss based on ideal path loss (free space)
+            return PLd0 + 10*2*np.log10(abs_dist)
+        #calculate angle from Rx to each Tx in radians
+        return np.arctan2(diff_vec[1],diff_vec[0])
+
+    def _noise_vals(self, m, num_rx, num_runs, ch_flag=1, seed=None, max_bytes=2**28, params=None):
+        """Stochastic offsets, [num_rx] x [num_runs] (or [n_settings] x
+        [num_rx] x [num_runs] if swept in `params`), of measurement type
+        `m` added to `_ideal_vals`: multipath delays (see
+        `_multipath_offsets`), log-normal shadowing or Laplacian angle
+        errors.  None if not `ch_flag`.  Unit draws are scaled by channel
+        parameters, so swept settings share draws."""
+        if not (ch_flag):
+            return None
+        if m == 0:
+            return self._multipath_offsets(num_rx, num_runs, seed, max_bytes, params)
+        if m == 1:
+            xsigma, = self._settings(('Xsigma',), params)
+            return xsigma*np.random.default_rng(seed).standard_normal(size=(num_rx,num_runs))
+        aoasigma, = self._settings(('AoAsigma',), params)
+        return aoasigma*np.random.default_rng(seed).laplace(size=(num_rx,num_runs))
+
+    def _meas_vals(self, m, diff_vec, abs_dist, ch_flag=1, seed=None, max_bytes=2**28, params=None):
+        """Absolute measurements of type `m`, `_ideal_vals` plus
+        `_noise_vals`"""
+        vals = self._ideal_vals(m, diff_vec, abs_dist, ch_flag, params)
+        noise = self._noise_vals(m, *abs_dist.shape[-2:], ch_flag, seed, max_bytes, params)
+        return vals if noise is None else vals + noise
+
+    def _multipath_offsets(self, num_rx, num_runs, seed=None, max_bytes=2**28, params=None):
+        """
+        Multipath delay offsets (ns), [num_rx] x [num_runs], of the
+        Saleh-Valenzuela model: cluster and ray arrival times are gamma
+        distributed, each cluster/ray has a Rayleigh path gain and offset
+        is arrival time of the path with largest gain.
+
+        Runs are simulated in chunks such that the (num_rx x chunk x
+        clusters x rays) arrays stay within `max_bytes`, so peak memory
+        does not depend on `num_runs`.  Cluster times, ray times and
+        gains each draw from their own generator that persists across
+        chunks, so a single chunk reproduces the unchunked draws exactly
+        and more chunks keep the same statistics.
+
+        Standard (unit scale) variates are drawn once and scaled by the
+        multipath parameters, so settings swept in `params` share draws
+        ([n_settings] x [num_rx] x [num_runs] offsets, each same as
+        offsets of a channel with that setting and `seed`).
+        """
+        #add in Poisson delays and scale using Rayleigh values
+        names = ('maxSpreadT', 'PoissonInvLambda', 'Poissoninvlambda', 'PoissonGamma', 'Poissongamma')
+        poisson = np.broadcast_arrays(*[np.ravel(p).astype(np.float64) for p in self._settings(names, params)])
+        n_settings = poisson[0].size
+        offsets = np.empty((n_settings, num_rx, num_runs))
+
+        #settings with same number of clusters and rays share draws
+        groups = {}
+        for s, (maxspreadt, pIL, pil, _, _) in enumerate(zip(*poisson)):
+            #set up typical cluster, ray numbers based on provide values
+            num_clstrs = int(maxspreadt // pIL)
+            if num_clstrs == 0: num_clstrs=1
+            num_rays = int((2*pIL) // pil)
+            groups.setdefault((num_clstrs, num_rays), []).append(s)
+
+        for (num_clstrs, num_rays), settings in groups.items():
+            clstr_idx = np.arange(0, num_clstrs)
+            ray_idx = np.arange(0, num_rays)
+            #generators of cluster timing, ray timing and path gains
+            rng_clstr, rng_ray, rng_gain = [np.random.default_rng(s) for s in _child_seeds(seed, 3)]
+
+            #chunk runs by bytes of ray times, path gains (and temporaries) per run
+            run_bytes = 4*num_rx*num_clstrs*num_rays*8
+            chunk = int(min(max(max_bytes // run_bytes, 1), max(num_runs, 1)))
+            for start in range(0, num_runs, chunk):
+                n = min(chunk, num_runs-start)
+                #generate unit cluster and ray timing and path gains
+                clstr_std = rng_clstr.standard_gamma(clstr_idx, size=(num_rx,n,num_clstrs))[..., np.newaxis]
+                ray_std = rng_ray.standard_gamma(ray_idx, size=(num_rx,n,num_clstrs,num_rays))
+                gain_std = rng_gain.rayleigh(size=ray_std.shape)
+
+                for s in settings:
+                    _, pIL, pil, pG, pg = [p[s] for p in poisson]
+                    #get path gains for cluster/ray combos (in place)
+                    gains = np.multiply(ray_std, -pil)
+                    gains /= pg
+                    np.exp(gains, out=gains)
+                    gains *= np.exp(-(pIL*clstr_std)/pG)
+                    gains /= 2
+                    gains *= gain_std
+
+                    #find largest path gain, offset is its cluster plus ray time
+                    times_idx = np.argmax(gains.reshape(num_rx, n, num_clstrs*num_rays), axis=2)[..., np.newaxis]
+                    del gains
+                    offsets[s, :, start:start+n] = (pIL*np.take_along_axis(clstr_std[..., 0], times_idx // num_rays, axis=2)
+                                                    + pil*np.take_along_axis(ray_std.reshape(num_rx, n, -1), times_idx, axis=2))[..., 0]
+        #unswept multipath parameters, [num_rx] x [num_runs]
+        return offsets if any(name in (params or {}) for name in names) else offsets[0]
+
+    @_timed()
     def generate_Xmodel(self, ch_delay_flag=1, ch_gain_flag=1, ch_angle_flag=1,
-                        meas_flag=6, diff_array= [1,0,0], seed=None):
+                        meas_flag=6, diff_array= [1,0,0], seed=None, max_bytes=2**28):
 
         """ Generates a set of measurements based on passed parameters
         that can be used for a dictionary or training/testing of
@@ -570,52 +698,397 @@ class RFchannel:
         >    - [1,1,1] - TDOA, DRSS, and DAoA
         >    - [tdoa_flag, drss_flag, daoa_flag]
         >
-        >__seed__ : integer, default=None
-        >- set for reprodducible results
+        >__seed__ : integer or SeedSequence, default=None
+        >- set for reprodducible results, a `np.random.SeedSequence`
+        >    gives independent streams to each random quantity
+        >
+        >__max_bytes__ : integer, default=2**28
+        >- memory budget (bytes) of multipath simulation, see
+        >    `calculate_Rxxdelay`
 
         ___Returns___
 
         >Self, sets self.X_model
         >- Format is [n_runs]x[measurements] (sized set by meas_flag,
         >    diff_array parameters)
+        >
+        >Self, sets self.n_meas_array
+        >- Number of each type of measurements in X_model, e.g.,
+        >    `n_meas_array` of kernel trick regressors
+        >
+        >Self, sets self.rxx_delay, self.rxx_rssi, self.rxx_aoa
+        >- Column views of X_model for measurement types selected by
+        >    meas_flag, None for others
+        >
+        >Self, sets self.timings_['generate_Xmodel']
+        >- Stages of call if profiled, see `stage_profiler`
 
         """
         #get basic parameters inherent in rxtx_locations
-        rxtx_locs=self.rxtx_locs
-        tdoa_flag, drss_flag, daoa_flag = diff_array
-
-        # generate delay based on Tx and Rx locations
-        self.calculate_Rxxdelay(ch_delay_flag = ch_delay_flag, tdoa_flag = tdoa_flag, seed=seed)
-        tde_len=self.rxx_delay.shape[1]
-        Rxx_delay=self.rxx_delay
-
-        #generate power measurements based on Tx and Rx locations
-        self.calculate_RxxRssi(ch_gain_flag=ch_gain_flag, drss_flag=drss_flag, seed=seed)
-        rss_len = self.rxx_rssi.shape[1]
-        Rxx_rssi= self.rxx_rssi
-
-        #generate aoa measurements based on Tx and Rx locations
-        self.calculate_AoA(ch_angle_flag= ch_angle_flag, daoa_flag= daoa_flag, seed=seed)
-        aoa_len=self.rxx_aoa.shape[1]
-        Abs_aoa=self.rxx_aoa
-
-        if (meas_flag == 0): X_model = Rxx_delay
-        elif (meas_flag==1): X_model = Rxx_rssi
-        elif (meas_flag==2): X_model = Abs_aoa
-        elif (meas_flag==3): X_model = np.concatenate((Rxx_delay, Rxx_rssi),axis=1)
-        elif (meas_flag==4): X_model = np.concatenate((Rxx_delay, Abs_aoa),axis=1)
-        elif (meas_flag==5): X_model = np.concatenate((Rxx_rssi, Abs_aoa), axis=1)
-        elif (meas_flag==6): X_model = np.concatenate((Rxx_delay, Rxx_rssi, Abs_aoa), axis=1)
-        else: raise ValueError('bad meas_flag')
+        _, num_rx, num_runs = self.rxtx_locs.shape
+        num_rx -= 1 #2nd dimension has one Tx and rest Rx
+        xmodel_args = dict(ch_delay_flag=ch_delay_flag, ch_gain_flag=ch_gain_flag, ch_angle_flag=ch_angle_flag,
+                           meas_flag=meas_flag, diff_array=diff_array, seed=seed, max_bytes=max_bytes)
+        #measurement types (tdoa, rss, aoa) of meas_flag
+        _, n_meas = _meas_layout(meas_flag, diff_array, num_rx)
+
+        #allocate feature matrix once, deterministic part (geometry) cached, then only selected measurement types
+        t0 = _tic()
+        X_model = np.empty((num_runs, sum(n_meas)))
+        _toc('allocate', t0, X_model)
+        ideal = self._cached_ideal(**xmodel_args)
+        rxx_views = self._write_meas(X_model, ideal, **xmodel_args)
 
         #save parameters to self
+        self._save_xmodel_args(n_meas, **xmodel_args)
+        self.rxx_delay, self.rxx_rssi, self.rxx_aoa = rxx_views
+        self.X_model = X_model
+
+        return self
+
+    def _ideal_meas(self, diff_vec, abs_dist, ch_delay_flag=1, ch_gain_flag=1, ch_angle_flag=1,
+                    meas_flag=6, params=None, **kwargs):
+        """Returns dictionary of `_ideal_vals` of measurement types (0-tdoa,
+        1-rss, 2-aoa) selected by `meas_flag`"""
+        ch_flags = (ch_delay_flag, ch_gain_flag, ch_angle_flag)
+        return {m: self._ideal_vals(m, diff_vec, abs_dist, ch_flags[m], params) for m in _MEAS_TYPES[meas_flag]}
+
+    def _cached_ideal(self, **xmodel_args):
+        """Returns `_ideal_meas` of self.rxtx_locs, cached until locations
+        (new array, e.g., `generate_RxTxlocations`), channel parameters
+        or channel flags and `meas_flag` of `xmodel_args` change"""
+        key = tuple(xmodel_args[name] for name in ('meas_flag', 'ch_delay_flag', 'ch_gain_flag', 'ch_angle_flag'))
+        key += tuple(getattr(self, name) for name in _RFCHANNEL_PARAMS)
+        t0, nbytes = _tic(), 0
+        cache = self._ideal_cache
+        if cache is None or cache[0] is not self.rxtx_locs or cache[1] != key:
+            diff_vec, abs_dist = self._rxtx_geometry()
+            cache = (self.rxtx_locs, key, self._ideal_meas(diff_vec, abs_dist, **xmodel_args))
+            self._ideal_cache = cache
+            nbytes = None
+        _toc('ideal', t0, *cache[2].values(), nbytes=nbytes, source='RFchannel')
+        return cache[2]
+
+    def _write_meas(self, out, ideal, ch_delay_flag=1, ch_gain_flag=1, ch_angle_flag=1,
+                    meas_flag=6, diff_array=[1,0,0], seed=None, max_bytes=2**28, params=None, n_draws=None):
+        """Writes measurements selected by `meas_flag`, deterministic part
+        `ideal` (see `_ideal_meas`) plus stochastic offsets, into columns
+        of `out`, [...] x [num_runs] x [measurements] where leading axes
+        are settings swept in `params` (see `generate_sweep`), sensor
+        layouts (see `generate_layouts`) or `n_draws` independent draws
+        of offsets (see `draw_Xmodel`).  Returns column views of tdoa,
+        rss and aoa measurements (None if not selected)."""
+        num_rx, num_runs = next(iter(ideal.values())).shape[-2:]
+        meas_types, n_meas = _meas_layout(meas_flag, diff_array, num_rx)
+        col_idx = np.concatenate(([0], np.cumsum(n_meas)))
+        ch_flags = (ch_delay_flag, ch_gain_flag, ch_angle_flag)
+        rxx_views = [None, None, None]
+        type_seeds = _child_seeds(seed, 3)
+        for m, start, stop in zip(meas_types, col_idx[:-1], col_idx[1:]):
+            #offsets of all draws at once, draws stacked as extra sensors
+            t0 = _tic()
+            noise = self._noise_vals(m, num_rx*(n_draws or 1), num_runs, ch_flags[m], type_seeds[m], max_bytes, params)
+            _toc('noise', t0, noise, source='RFchannel')
+            t0 = _tic()
+            if noise is None:
+                vals = ideal[m]
+            elif n_draws is None:
+                vals = ideal[m] + noise
+            else:
+                vals = ideal[m] + noise.reshape(n_draws, num_rx, num_runs)
+            #write (differential) measurements straight into columns, broadcast over leading axes
+            rxx_views[m] = out[..., start:stop]
+            if diff_array[m]:
+                _pair_diff(vals, out=rxx_views[m])
+            else:
+                rxx_views[m][...] = np.swapaxes(vals, -1, -2)
+            _toc('write', t0, rxx_views[m], nbytes=(0 if noise is None else vals.nbytes), source='RFchannel')
+        return rxx_views
+
+    def _save_xmodel_args(self, n_meas, ch_delay_flag=1, ch_gain_flag=1, ch_angle_flag=1,
+                          meas_flag=6, diff_array=[1,0,0], seed=None, max_bytes=2**28):
+        """Saves flags, seed and number of measurements of each type
+        (`n_meas`) of generated measurements to self"""
         self.ch_delay_flag = ch_delay_flag
         self.ch_gain_flag = ch_gain_flag
         self.ch_angle_flag = ch_angle_flag
-        self.tdoa_flag = tdoa_flag
-        self.drss_flag = drss_flag
-        self.daoa_flag = daoa_flag
+        self.tdoa_flag, self.drss_flag, self.daoa_flag = diff_array
         self.seed_Xmodel = seed
+        self.meas_flag = meas_flag
+        self.n_meas_array = np.array(n_meas)
+
+    @_timed()
+    def draw_Xmodel(self, n_draws=1, seed=None, max_bytes=2**28, out=None):
+        """
+        Redraws only the channel impairments (multipath delays,
+        shadowing and angle errors) of the current `rxtx_locs`, e.g., for
+        Monte Carlo error analysis with fixed geometry.  Flags and
+        measurement types are those of the last `generate_Xmodel`.  The
+        deterministic part (ideal delays, path loss means and ideal
+        angles) is cached after the first call, so each draw only costs
+        the random offsets, the add and the pair differences.  A draw is
+        the same as `generate_Xmodel` with its seed, e.g., `n_draws=1`
+        reproduces `generate_Xmodel(seed=seed)`.
+
+        The cache is kept until `rxtx_locs` is replaced (e.g., by
+        `generate_RxTxlocations`), channel parameters or flags change;
+        changing `rxtx_locs` in place is not detected.
+
+        __Parameters__
+
+        >__n_draws__ : integer, default=1
+        >- number of independent draws, stacked along a leading axis
+        >
+        >__seed__ : integer or SeedSequence, default=None
+        >- set for reproducible results
+        >
+        >__max_bytes__ : integer, default=2**28
+        >- memory budget (bytes) of multipath simulation of all draws,
+        >    see `calculate_Rxxdelay`
+        >
+        >__out__ : ndarray, default=None
+        >- array of shape [n_draws] x [n_runs] x [measurements] to write
+        >    to, e.g., `np.lib.format.open_memmap`
+
+        __Returns__
+
+        >Self, sets self.X_draws
+        >- Format is [n_draws] x [n_runs] x [measurements]
+        """
+        if not hasattr(self, 'meas_flag'):
+            raise ValueError('no measurements to redraw, call generate_Xmodel first')
+        xmodel_args = dict(ch_delay_flag=self.ch_delay_flag, ch_gain_flag=self.ch_gain_flag,
+                           ch_angle_flag=self.ch_angle_flag, meas_flag=self.meas_flag,
+                           diff_array=[self.tdoa_flag, self.drss_flag, self.daoa_flag], seed=seed, max_bytes=max_bytes)
+        ideal = self._cached_ideal(**xmodel_args)
+        num_rx, num_runs = next(iter(ideal.values())).shape
+        _, n_meas = _meas_layout(self.meas_flag, xmodel_args['diff_array'], num_rx)
+        out = _check_out(out, (n_draws, num_runs, sum(n_meas)))
+        self._write_meas(out, ideal, n_draws=n_draws, **xmodel_args)
+
+        #save parameters to self
+        self.seed_draws = seed
+        self.X_draws = out
+
+        return self
+
+    @_timed()
+    def generate_sweep(self, sweep_params, xmodel_args={}, out=None):
+        """
+        Generates measurements (`generate_Xmodel`) of the current
+        `rxtx_locs` for a sweep of channel parameters at once.  Geometry
+        is computed once, only measurement types depending on swept
+        parameters are computed per setting (vectorized over a leading
+        settings axis) and all settings share the same random draws
+        (common random numbers), so `X_sweep[s]` is the `X_model` of a
+        channel with setting `s` and same `seed`, and differences between
+        settings are due to the parameters only.
+
+        __Parameters__
+
+        >__sweep_params__ : dictionary
+        >- channel parameters (see `RFchannel`) to sweep, each an array
+        >    of values of the settings, e.g., `{'PathLossN':
+        >    np.linspace(2,4,9)}`.  Arrays are broadcast to a common
+        >    number of settings, others parameters are from self.
+        >
+        >__xmodel_args__ : dictionary, default={}
+        >- arguments of `generate_Xmodel`
+        >
+        >__out__ : ndarray, default=None
+        >- array of shape [n_settings] x [n_runs] x [measurements] to
+        >    write to, e.g., `np.lib.format.open_memmap` to stream sweep
+        >    to disk
+
+        __Returns__
+
+        >Self, sets self.X_sweep
+        >- Format is [n_settings] x [n_runs] x [measurements]
+        >
+        >Self, sets self.sweep_params, self.n_meas_array and flags
+        >- broadcast parameters of the settings, others same as
+        >    `generate_Xmodel`
+        """
+        bad_keys = set(sweep_params) - set(_RFCHANNEL_PARAMS)
+        if bad_keys:
+            raise ValueError('{} not channel parameters, options are {}'.format(sorted(bad_keys), _RFCHANNEL_PARAMS))
+        sweep_params = dict(zip(sweep_params, np.broadcast_arrays(*[np.ravel(val).astype(np.float64)
+                                                                   for val in sweep_params.values()])))
+        n_settings = next(iter(sweep_params.values())).size if sweep_params else 1
+
+        #get basic parameters, same layout of measurements as generate_Xmodel
+        xmodel_args = {**_XMODEL_ARGS, **xmodel_args}
+        _, num_rx, num_runs = self.rxtx_locs.shape
+        num_rx -= 1 #2nd dimension has one Tx and rest Rx
+        _, n_meas = _meas_layout(xmodel_args['meas_flag'], xmodel_args['diff_array'], num_rx)
+        out = _check_out(out, (n_settings, num_runs, sum(n_meas)))
+
+        #geometry once, then measurements of all settings from shared draws
+        #(unswept types are [num_rx] x [num_runs], broadcast over settings)
+        diff_vec, abs_dist = self._rxtx_geometry()
+        ideal = self._ideal_meas(diff_vec, abs_dist, params=sweep_params, **xmodel_args)
+        self._write_meas(out, ideal, params=sweep_params, **xmodel_args)
+
+        #save parameters to self
+        self._save_xmodel_args(n_meas, **xmodel_args)
+        self.sweep_params = sweep_params
+        self.X_sweep = out
+
+        return self
+
+    @_timed()
+    def generate_layouts(self, sensor_layouts, n_runs=1000, areaWL=np.array([20,60]), seed=None,
+                         xmodel_args={}, out=None):
+        """
+        Generates locations and measurements of a stack of candidate
+        sensor (Rx) layouts at once, e.g., for sensor placement studies.
+        All layouts share the same random Tx locations and random draws
+        (common random numbers), so `X_layouts[l]` is the `X_model` of
+        `generate_RxTxlocations` with `sensor_locs` of layout `l` (and
+        `rxtx_flag=3`, `seed`) then `generate_Xmodel`, and differences
+        between layouts are due to placement only.  Geometry and
+        measurements are vectorized over a leading layouts axis.  See
+        `evaluate_layouts` of `rfml_localization.core` to score layouts.
+
+        __Parameters__
+
+        >__sensor_layouts__ : ndarray of shape (n_layouts, 2, n_rx)
+        >- Locations of sensors of each candidate layout
+        >
+        >__n_runs__, __areaWL__, __seed__
+        >- see `generate_RxTxlocations`
+        >
+        >__xmodel_args__ : dictionary, default={}
+        >- arguments of `generate_Xmodel`
+        >
+        >__out__ : ndarray, default=None
+        >- array of shape [n_layouts] x [n_runs] x [measurements] to
+        >    write to, e.g., `np.lib.format.open_memmap`
+
+        __Returns__
+
+        >Self, sets self.X_layouts
+        >- Format is [n_layouts] x [n_runs] x [measurements]
+        >
+        >Self, sets self.sensor_layouts, self.rxtx_locs, self.n_meas_array and flags
+        >- `rxtx_locs` has Tx locations (targets shared by all layouts)
+        >    and sensors of first layout, others same as `generate_Xmodel`
+        """
+        sensor_layouts = np.asarray(sensor_layouts, dtype=np.float64)
+        if sensor_layouts.ndim != 3 or sensor_layouts.shape[1] != len(areaWL):
+            raise ValueError('sensor_layouts of shape {} not (n_layouts, {}, n_rx)'.format(sensor_layouts.shape, len(areaWL)))
+        n_layouts, _, n_rx = sensor_layouts.shape
+        xmodel_args = {**_XMODEL_ARGS, **xmodel_args}
+        _, n_meas = _meas_layout(xmodel_args['meas_flag'], xmodel_args['diff_array'], n_rx)
+        out = _check_out(out, (n_layouts, n_runs, sum(n_meas)))
+
+        #random Tx locations (same draws as generate_RxTxlocations), first layout
+        self.generate_RxTxlocations(n_rx, areaWL, n_runs, sensor_layouts[0][..., np.newaxis], rxtx_flag=3, seed=seed)
+        #geometry of all layouts, [location dims] x [n_layouts] x [num_rx] x [num_runs]
+        diff_vec = self.rxtx_locs[:, np.newaxis, :1, :] - np.moveaxis(sensor_layouts, 0, 1)[..., np.newaxis]
+        abs_dist = np.linalg.norm(diff_vec, axis=0)
+        self._write_meas(out, self._ideal_meas(diff_vec, abs_dist, **xmodel_args), **xmodel_args)
+
+        #save parameters to self
+        self._save_xmodel_args(n_meas, **xmodel_args)
+        self.sensor_layouts = sensor_layouts
+        self.X_layouts = out
+
+        return self
+
+    def generate_parallel(self, n_runs=1000, n_workers=None, seed=None, n_shards=None,
+                          rxtx_args={}, xmodel_args={}):
+        """
+        Generates locations (`generate_RxTxlocations`) and measurements
+        (`generate_Xmodel`) of `n_runs` in parallel processes.  Runs are
+        split into `n_shards` and each shard draws from independent
+        child streams of one `np.random.SeedSequence` of `seed` (a passed
+        SeedSequence is not spawned from, so repeated calls agree), so
+        results only depend on `seed` and `n_shards` (not on number or
+        scheduling of workers) and are put together in order.
+
+        __Parameters__
+
+        >__n_runs__ : integer, default=1000
+        >- Number of observations/samples/runs to generate
+        >
+        >__n_workers__ : integer, default=None
+        >- Number of worker processes, defaults to number of CPUs.  If 1,
+        >    shards are generated in this process.
+        >
+        >__seed__ : integer or SeedSequence, default=None
+        >- set for reproducible results
+        >
+        >__n_shards__ : integer, default=None
+        >- Number of shards of runs, defaults to `n_workers`.  Set to
+        >    get same results with different number of workers.
+        >
+        >__rxtx_args__ : dictionary, default={}
+        >- arguments of `generate_RxTxlocations` (except n_runs, seed).
+        >    Grid locations (`grid_flag`) and Tx/Rx locations shared
+        >    across runs (`rxtx_flag` of 0 or 1) are not supported.
+        >
+        >__xmodel_args__ : dictionary, default={}
+        >- arguments of `generate_Xmodel` (except seed)
+
+        __Returns__
+
+        >Self, sets self.rxtx_locs, self.X_model, self.n_meas_array and
+        >    location/measurement parameters and flags (same as
+        >    `generate_RxTxlocations` and `generate_Xmodel`)
+        """
+        if rxtx_args.get('grid_flag', 0):
+            raise ValueError('grid_flag not supported, grid locations can not be split across shards')
+        if rxtx_args.get('rxtx_flag', 3) in (0, 1):
+            raise ValueError('rxtx_flag of 0 or 1 not supported, shared locations can not be split across shards')
+        if n_workers is None:
+            n_workers = os.cpu_count() or 1
+        if n_shards is None:
+            n_shards = n_workers
+        n_shards = max(min(n_shards, n_runs), 1)
+        seed_seq = seed if isinstance(seed, np.random.SeedSequence) else np.random.SeedSequence(seed)
+
+        #split runs into shards, each with its own child stream (caller's seed_seq not spawned)
+        shard_runs = [n_runs//n_shards + (i < n_runs % n_shards) for i in range(n_shards)]
+        channel_params = {key: getattr(self, key) for key in _RFCHANNEL_PARAMS}
+        shard_args = [(channel_params, n, shard_seed, rxtx_args, xmodel_args)
+                      for n, shard_seed in zip(shard_runs, _child_seeds(seed_seq, n_shards))]
+        if n_workers == 1:
+            shards = [_simulate_shard(*args) for args in shard_args]
+        else:
+            with ProcessPoolExecutor(max_workers=n_workers) as executor:
+                shards = list(executor.map(_simulate_shard, *zip(*shard_args)))
+
+        #put shards together in order
+        rxtx_locs = np.concatenate([shard[0] for shard in shards], axis=2)
+        X_model = np.concatenate([shard[1] for shard in shards], axis=0)
+
+        #save parameters to self (same for all shards)
+        for key, val in shards[0][3].items():
+            setattr(self, key, val)
+        self.n_runs = n_runs
+        self.seed_parallel = seed
+        self.rxtx_locs = rxtx_locs
+        self.n_meas_array = shards[0][2]
         self.X_model = X_model
 
-        return self
\ No newline at end of file
+        return self
+
+# Cell
+#parameters of RFchannel instances, passed to worker processes
+_RFCHANNEL_PARAMS = ('maxSpreadT', 'PoissonInvLambda', 'Poissoninvlambda', 'PoissonGamma',
+                     'Poissongamma', 'PathLossN', 'Xsigma', 'Wavelength', 'AoAsigma')
+#location/measurement parameters and flags set by generate_RxTxlocations and generate_Xmodel
+_RFCHANNEL_FLAGS = ('n_rx', 'areaWL', 'sensor_locs', 'rxtx_flag', 'grid_flag', 'ch_delay_flag',
+                    'ch_gain_flag', 'ch_angle_flag', 'tdoa_flag', 'drss_flag', 'daoa_flag',
+                    'meas_flag')
+
+def _simulate_shard(channel_params, n_runs, seed, rxtx_args, xmodel_args):
+    """Generates locations and measurements of one shard of runs, see
+    `RFchannel.generate_parallel`"""
+    loc_seed, xmodel_seed = _child_seeds(seed, 2)
+    channel = RFchannel(**channel_params)
+    channel.generate_RxTxlocations(n_runs=n_runs, seed=loc_seed, **rxtx_args)
+    channel.generate_Xmodel(seed=xmodel_seed, **xmodel_args)
+    return (channel.rxtx_locs, channel.X_model, channel.n_meas_array,
+            {key: getattr(channel, key) for key in _RFCHANNEL_FLAGS})
\ No newline at end of file
@@ -3,13 +3,34 @@
 __all__ = ["index", "modules", "custom_doc_links", "git_url"]
 
 index = {"HFF_k_matrix": "00_core.ipynb",
+         "HFF_k_matrix_tiles": "00_core.ipynb",
+         "HFF_dist_cache": "00_core.ipynb",
+         "default_dist_cache": "00_core.ipynb",
+         "HFF_fold_dists": "00_core.ipynb",
+         "HFF_subset_dists": "00_core.ipynb",
+         "HFF_kernel_approx": "00_core.ipynb",
+         "HFF_sparse_predictor": "00_core.ipynb",
+         "HFF_sharded_predictor": "00_core.ipynb",
          "mse_EucDistance": "00_core.ipynb",
          "sklearn_kt_regressor": "00_core.ipynb",
          "glmnet_kt_regressor": "00_core.ipynb",
-         "RFchannel": "01_RFsimulation.ipynb"}
+         "evaluate_layouts": "00_core.ipynb",
+         "evaluate_subsets": "00_core.ipynb",
+         "kt_search_cv": "00_core.ipynb",
+         "kt_halving_search_cv": "00_core.ipynb",
+         "RFchannel": "01_RFsimulation.ipynb",
+         "RFdataset_writer": "02_dataset.ipynb",
+         "load_RFdataset": "02_dataset.ipynb",
+         "RFdictionary_cache": "02_dataset.ipynb",
+         "stage_profiler": "03_profiling.ipynb",
+         "keep_timings": "03_profiling.ipynb",
+         "RFpredict_server": "04_serving.ipynb"}
 
 modules = ["core.py",
-           "RFsimulation.py"]
+           "RFsimulation.py",
+           "dataset.py",
+           "profiling.py",
+           "serving.py"]
 
 doc_url = "https://elaird6.github.io/rfml_localization/"
 
@@ -1,14 +1,31 @@
 # AUTOGENERATED! DO NOT EDIT! File to edit: 00_core.ipynb (unless otherwise specified).
 
-__all__ = ['HFF_k_matrix', 'mse_EucDistance', 'sklearn_kt_regressor', 'glmnet_kt_regressor']
+__all__ = ['HFF_k_matrix', 'HFF_k_matrix_tiles', 'HFF_dist_cache', 'default_dist_cache', 'HFF_fold_dists',
+           'HFF_subset_dists', 'HFF_kernel_approx', 'HFF_sparse_predictor', 'HFF_sharded_predictor', 'mse_EucDistance',
+           'sklearn_kt_regressor', 'glmnet_kt_regressor', 'evaluate_layouts', 'evaluate_subsets', 'kt_search_cv',
+           'kt_halving_search_cv']
 
 # Cell
+import os
+import shutil
+import tempfile
 import numpy as np
-from sklearn.base import BaseEstimator
+import hashlib
+import threading
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from collections import OrderedDict
+from contextlib import contextmanager
+from itertools import combinations
+from sklearn.base import BaseEstimator, TransformerMixin, clone
 from sklearn.utils.validation import check_X_y, check_array, check_is_fitted
 from sklearn.metrics import pairwise_kernels, mean_squared_error
-from sklearn.preprocessing import Normalizer
-from sklearn.linear_model import Lasso
+from sklearn.metrics.pairwise import manhattan_distances, euclidean_distances
+from sklearn.preprocessing import normalize
+from sklearn.linear_model import Lasso, Ridge, ElasticNet, MultiTaskElasticNet, enet_path
+from sklearn.kernel_approximation import Nystroem
+from sklearn.model_selection import train_test_split, check_cv, ParameterGrid, ParameterSampler
+from threadpoolctl import ThreadpoolController
+from .profiling import _tic, _toc, _copied_bytes, _timed
 import glmnet_python; from glmnet import glmnet; from glmnetPredict import glmnetPredict
 
 
@@ -17,10 +34,15 @@ def HFF_k_matrix(fml = None,
                  fm = np.array([]),
                  kernel='laplacian',
                  num_meas_array = np.array([]),
-                 varMs = np.array([])
+                 varMs = np.array([]),
+                 out = None,
+                 dtype = np.float64,
+                 dist_cache = None
                 ):
     """ Function to generate a kernelized matrix.  The kernel used
-    defaults to laplacian (manhattan distance).
+    defaults to laplacian (manhattan distance).  The final kernel
+    matrix is allocated once (or passed in via `out`) and the kernel
+    of each measurement type is written into its own block of columns.
 
     ___Parameters___
 
@@ -48,11 +70,26 @@ def HFF_k_matrix(fml = None,
     >- scale factor for kernel/similarity measurement of each
     >    measurement type. It can be related to variance of each
     >    measurement type.
+    >
+    >__out__ : ndarray of shape (n_fm, n_types*n_fml), default = None
+    >- C-contiguous array of type `dtype` that the kernel matrix is
+    >    written into (e.g., reused buffer across calls).  If None, the
+    >    kernel matrix is allocated.
+    >
+    >__dtype__ : numpy dtype, default = np.float64
+    >- data type of kernel matrix, np.float32 halves memory footprint
+    >
+    >__dist_cache__ : HFF_dist_cache, default = None
+    >- cache of distance matrices for 'laplacian' and 'rbf' kernels.  If
+    >    passed, distances of each measurement type are reused from (or
+    >    added to) cache and only the kernel scale is applied.  See also
+    >    `HFF_fold_dists`.
 
     __Returns__
 
-    >returns a kernel matrix (k_matrix)
+    >returns a kernel matrix (k_matrix) of shape (n_fm, n_types*n_fml)
     """
+    t0 = _tic()
     #initialize some values and check entries
     if (np.size(num_meas_array) != np.size(varMs)):
         raise ValueError("Number of scales,{:d}, doesn't match number of feature types, {:d}".format(np.size(num_meas_array),np.size(varMs)))
@@ -61,29 +98,800 @@ def HFF_k_matrix(fml = None,
         fm = fml
     #if number of measurements is not passed, then only one type of measurements
     if num_meas_array.size == 0:
-        num_meas_array = np.array([np.size(fml.shape[1])])
+        num_meas_array = np.array([fml.shape[1]])
     #if none passed, set all scales to one
     if varMs.size == 0:
         varMs = np.ones(num_meas_array.size)
 
     #basic parameter settings
     num_features = len(num_meas_array);
-
-    idx = np.cumsum(num_meas_array)
-
-    #calculate kernel matrix
-    #calculate kernel matrix for first measurement type
-    k_matrix = pairwise_kernels(fm[:,0:idx[0]],fml[:,0:idx[0]],
+    n_fml = fml.shape[0]
+
+    idx = np.concatenate(([0], np.cumsum(num_meas_array)))
+
+    #allocate final kernel matrix once, or check passed buffer
+    k_shape = (fm.shape[0], num_features*n_fml)
+    if out is None:
+        k_matrix = np.empty(k_shape, dtype=dtype)
+    elif (out.shape != k_shape) or (out.dtype != dtype) or not out.flags['C_CONTIGUOUS']:
+        raise ValueError("out must be C-contiguous {} array of shape {}, got {} array of shape {}".format(np.dtype(dtype), k_shape, out.dtype, out.shape))
+    else:
+        k_matrix = out
+
+    #key data once if distances are cached (only applicable to some kernels)
+    if (dist_cache is not None) and (kernel in _HFF_DIST_FUNCS):
+        data_key = dist_cache.data_key(fm, fml) + (np.dtype(dtype).str,)
+    else:
+        dist_cache = None
+    #calculate kernel matrix in requested precision
+    fm = np.asarray(fm, dtype=dtype)
+    fml = np.asarray(fml, dtype=dtype)
+    #loop through measurement types, calculate kernels and write into column block
+    for m in np.arange(num_features):
+        if dist_cache is None:
+            k_matrix[:,m*n_fml:(m+1)*n_fml] = pairwise_kernels(fm[:,idx[m]:idx[m+1]],fml[:,idx[m]:idx[m+1]],
                                metric = kernel,
-                               gamma = varMs[0])
-    #loop through rest of measurement types, calculate kernels and concatenate them
-    for m in np.arange(num_features-1):
-        k_matrix = np.hstack((k_matrix, pairwise_kernels(fm[:,idx[m]:idx[m+1]],fml[:,idx[m]:idx[m+1]],
-                               metric = kernel,
-                               gamma = varMs[m+1])
-                             ))
+                               gamma = varMs[m])
+        else:
+            #get (cached) distances of measurement type, apply scale in place
+            D = dist_cache.distances(fm[:,idx[m]:idx[m+1]],fml[:,idx[m]:idx[m+1]], kernel,
+                                     key = data_key + (idx[m], idx[m+1]))
+            k_block = k_matrix[:,m*n_fml:(m+1)*n_fml]
+            np.multiply(D, -varMs[m], out=k_block)
+            np.exp(k_block, out=k_block)
+    _toc('kernel', t0, k_matrix, nbytes=(0 if out is not None else None), source='HFF_k_matrix')
     return k_matrix
 
+# Cell
+def HFF_k_matrix_tiles(fml = None,
+                       fm = np.array([]),
+                       kernel='laplacian',
+                       num_meas_array = np.array([]),
+                       varMs = np.array([]),
+                       max_bytes = 2**28,
+                       dtype = np.float64,
+                       normalize_rows = True,
+                       dist_cache = None
+                      ):
+    """ Generator that computes the kernelized matrix of `HFF_k_matrix`
+    in blocks of rows so that memory stays within a fixed budget
+    regardless of number of observations in `fm`.  Each block is
+    optionally L2 normalized by row, same as done by the kernel trick
+    regressors.
+
+    ___Parameters___
+
+    >__fml__, __fm__, __kernel__, __num_meas_array__, __varMs__, __dtype__, __dist_cache__
+    >- see `HFF_k_matrix`
+    >
+    >__max_bytes__ : integer, default = 2**28
+    >- memory budget (bytes) for a block of the kernel matrix plus the
+    >    temporary kernel of one measurement type.  At least one row is
+    >    always computed.
+    >
+    >__normalize_rows__ : boolean, default = True
+    >- whether to L2 normalize each row of kernel block
+
+    __Yields__
+
+    >__rows__ : slice
+    >- rows of `fm` covered by block
+    >
+    >__k_block__ : ndarray of shape (n_rows, n_types*n_fml)
+    >- kernel matrix of block. Note that the buffer is reused, so block
+    >    is only valid until next iteration (copy to keep)
+    """
+    #check to see if 'new' measurements, if not, use reference measurements only
+    if fm.size == 0:
+        fm = fml
+    n_types = max(np.size(num_meas_array), 1)
+    n_fm, n_fml = fm.shape[0], fml.shape[0]
+
+    #size blocks by bytes per row of kernel matrix plus (float64) temporary per type
+    row_bytes = n_fml*(n_types*np.dtype(dtype).itemsize + 8)
+    n_rows = int(min(max(max_bytes // row_bytes, 1), max(n_fm, 1)))
+    t0 = _tic()
+    k_buffer = np.empty((n_rows, n_types*n_fml), dtype=dtype)
+    _toc('allocate', t0, k_buffer, source='HFF_k_matrix_tiles')
+
+    #loop through blocks of rows, kernelize into reused buffer
+    for start in range(0, n_fm, n_rows):
+        rows = slice(start, min(start+n_rows, n_fm))
+        k_block = HFF_k_matrix(fml=fml, fm=fm[rows], kernel=kernel,
+                               num_meas_array=num_meas_array, varMs=varMs,
+                               out=k_buffer[:rows.stop-rows.start], dtype=dtype,
+                               dist_cache=dist_cache)
+        if normalize_rows:
+            t0 = _tic()
+            normalize(k_block, copy=False)
+            _toc('normalize', t0, k_block, nbytes=0, source='HFF_k_matrix_tiles')
+        yield rows, k_block
+
+def _tiled_predict(predict_fn, tiles, n_samples):
+    """Applies `predict_fn` to each kernel block yielded by `tiles`
+    (see `HFF_k_matrix_tiles`) and writes estimates into a single
+    preallocated output array."""
+    y_pred = None
+    for rows, k_block in tiles:
+        t0 = _tic()
+        y_block = predict_fn(k_block)
+        _toc('solve', t0, y_block)
+        if y_pred is None:
+            y_pred = np.empty((n_samples,)+y_block.shape[1:], dtype=y_block.dtype)
+        y_pred[rows] = y_block
+    return y_pred
+
+# Cell
+#distance used by kernels that are an elementwise function, exp(-scale*D), of distance D
+_HFF_DIST_FUNCS = {'laplacian': manhattan_distances,
+                   'rbf': lambda fm, fml: euclidean_distances(fm, fml, squared=True)}
+
+class HFF_dist_cache:
+    """
+    Bounded, least recently used (LRU) cache of the distance matrices of
+    each measurement type used by `HFF_k_matrix`.  The 'laplacian' and
+    'rbf' kernels are an elementwise `exp(-scale*D)` of the manhattan
+    or squared euclidean distance `D`, so hyperparameter sweeps over
+    kernel scales (e.g., `kernel_s0`-`kernel_s2`) only compute `D` once
+    for a given set of data and measurement type.
+
+    Entries are keyed by fingerprints (hash of contents) of the `fm`
+    and `fml` data passed to `HFF_k_matrix` along with the dtype, the
+    column slice of each measurement type (from `num_meas_array`) and
+    kernel.  A cache is shared, not copied, when estimators using it are
+    cloned (e.g., by SKLearn's search tools).
+
+    __Parameters__
+
+    >__max_bytes__ : integer, default = 2**30
+    >- maximum total size of cached distance matrices, least recently
+    >    used matrices are evicted first.  Distance matrices larger
+    >    than `max_bytes` are not cached.
+    """
+
+    def __init__(self, max_bytes=2**30):
+        self.max_bytes = max_bytes
+        self.clear()
+
+    def clear(self):
+        """Empties cache and resets hit/miss counters, `hits_` and
+        `misses_`."""
+        self.dists_ = OrderedDict()
+        self.nbytes_ = 0
+        self.hits_ = 0
+        self.misses_ = 0
+        return self
+
+    def __deepcopy__(self, memo):
+        #cache is shared, e.g., by estimators cloned in sklearn's search tools
+        return self
+
+    @staticmethod
+    def fingerprint(a):
+        """Returns hash of contents, shape and dtype of array `a`"""
+        a = np.ascontiguousarray(a)
+        h = hashlib.blake2b(repr((a.shape, a.dtype.str)).encode(), digest_size=16)
+        h.update(a.reshape(-1).view(np.uint8))
+        return h.hexdigest()
+
+    def data_key(self, fm, fml):
+        """Returns key of data passed to `HFF_k_matrix`, fingerprints of
+        `fm` and `fml`"""
+        return (self.fingerprint(fm), self.fingerprint(fml))
+
+    def put(self, key, D):
+        """Adds distance matrix `D` under `key` and evicts least recently
+        used entries to stay within `max_bytes`."""
+        if key in self.dists_:
+            self.nbytes_ -= self.dists_.pop(key).nbytes
+        if D.nbytes > self.max_bytes:
+            return self
+        while self.dists_ and (self.nbytes_ + D.nbytes > self.max_bytes):
+            self.nbytes_ -= self.dists_.popitem(last=False)[1].nbytes
+        self.dists_[key] = D
+        self.nbytes_ += D.nbytes
+        return self
+
+    def distances(self, fm, fml, kernel, key=None):
+        """
+        Returns distance matrix of `kernel` ('laplacian' or 'rbf')
+        between `fm` and `fml` of a single measurement type, computed
+        only if not in cache.  Returned matrix is shared with cache and
+        should not be modified.
+
+        __Parameters__
+
+        > __fm__, __fml__ : ndarray of shape (n_fm, n_meas), (n_fml, n_meas)
+        >- measurements of one measurement type
+        >
+        > __kernel__ : str
+        >- 'laplacian' (manhattan distance) or 'rbf' (squared euclidean)
+        >
+        > __key__ : tuple, default = None
+        >- key of entry, defaults to `data_key` of `fm` and `fml`
+
+        __Returns__
+
+        > __D__ : ndarray of shape (n_fm, n_fml)
+        """
+        if key is None:
+            key = self.data_key(fm, fml)
+        key = key + (kernel,)
+        if key in self.dists_:
+            self.dists_.move_to_end(key)
+            self.hits_ += 1
+            return self.dists_[key]
+        self.misses_ += 1
+        D = _HFF_DIST_FUNCS[kernel](fm, fml)
+        self.put(key, D)
+        return D
+
+#shared cache used by kernel trick regressors when `cache_dist` is True
+default_dist_cache = HFF_dist_cache()
+
+def _get_dist_cache(cache_dist):
+    """Returns distance cache of kernel trick regressor's `cache_dist`
+    parameter: `default_dist_cache` if True, the passed cache if a
+    `HFF_dist_cache` or None if False."""
+    if isinstance(cache_dist, HFF_dist_cache):
+        return cache_dist
+    return default_dist_cache if cache_dist else None
+
+# Cell
+class HFF_fold_dists(HFF_dist_cache):
+    """
+    Distance source for `HFF_k_matrix` that computes the distance matrix
+    of each measurement type once for an entire data set, `X`, and then
+    slices rows and columns of it for any subset of `X`.  This is the
+    precomputed kernel trick for cross-validation: with kernel trick
+    regressors given `cache_dist=HFF_fold_dists(X)`, fit and predict of
+    each fold (of any SKLearn splitter) and each candidate kernel scale
+    reuse the same distances, only the kernel scale is applied.
+
+    Rows passed to `HFF_k_matrix` are matched to rows of `X` by
+    contents.  Data that is not a subset of `X` falls back to the
+    LRU cache behavior of `HFF_dist_cache`.  Note that memory is
+    n_samples^2 per measurement type and kernel.
+
+    __Parameters__
+
+    >__X__ : ndarray of shape (n_samples, n_features)
+    >- full data set that folds are drawn from
+    >
+    >__max_bytes__ : integer, default = 2**30
+    >- see `HFF_dist_cache`, used for data not in `X`
+    """
+
+    def __init__(self, X, max_bytes=2**30):
+        super().__init__(max_bytes=max_bytes)
+        self.X = check_array(X)
+        self.full_dists_ = {}
+        #map contents of each row to its index
+        self.row_index_ = {row.tobytes(): i for i, row in enumerate(self.X)}
+
+    def rows(self, fm):
+        """Returns indices of rows of `fm` within `X`, None if any row
+        is not in `X`"""
+        fm = np.asarray(fm, dtype=self.X.dtype)
+        if fm.ndim != 2 or fm.shape[1] != self.X.shape[1]:
+            return None
+        try:
+            return np.array([self.row_index_[row.tobytes()] for row in fm], dtype=np.intp)
+        except KeyError:
+            return None
+
+    def data_key(self, fm, fml):
+        """Returns row indices of `fm` and `fml` within `X`, or their
+        fingerprints if not a subset of `X`"""
+        rows_fm, rows_fml = self.rows(fm), self.rows(fml)
+        if rows_fm is None or rows_fml is None:
+            return super().data_key(fm, fml)
+        return (rows_fm, rows_fml)
+
+    def distances(self, fm, fml, kernel, key=None):
+        """
+        Returns distance matrix of `kernel` between `fm` and `fml` of a
+        single measurement type, sliced from distances of `X` when
+        `key` holds row indices (see `data_key`) and `key[-2:]` the
+        columns of the measurement type.
+        """
+        if key is None or isinstance(key[0], str):
+            return super().distances(fm, fml, kernel, key=key)
+        rows_fm, rows_fml = key[0], key[1]
+        cols = key[-2:]
+        if (cols + (kernel,)) not in self.full_dists_:
+            X_type = self.X[:, cols[0]:cols[1]]
+            self.full_dists_[cols + (kernel,)] = _HFF_DIST_FUNCS[kernel](X_type, X_type)
+        return self.full_dists_[cols + (kernel,)][np.ix_(rows_fm, rows_fml)]
+
+# Cell
+class HFF_subset_dists:
+    """
+    Distance contributions of each sensor (Rx) and sensor pair to the
+    distances of `HFF_k_matrix`, for evaluating models on subsets of
+    sensors, e.g., sensors dropping out, without re-simulating or
+    recomputing distances.  Manhattan ('laplacian') and squared
+    euclidean ('rbf') distances add up over features, so the distance
+    of a measurement type over a subset of sensors is the sum of the
+    contributions of its kept columns, or the distance over all sensors
+    minus the contributions of dropped sensors (whichever is fewer
+    arrays).  Columns of per-sensor types (e.g., RSS/AoA) are dropped
+    with their sensor, columns of per-pair types (e.g., TDOA/DRSS/DAoA)
+    with either sensor of the pair, so per-pair types subtract the sum
+    of columns of each dropped sensor and add back pairs of two dropped
+    sensors (inclusion-exclusion).
+
+    Note that memory is n_samples^2 per feature of `X` plus per sensor
+    of per-pair types.  Savings are largest for the 'laplacian' kernel
+    and many sensors (many pairs), squared euclidean distances of
+    'rbf' are already fast matrix products.
+
+    __Parameters__
+
+    >__X__ : ndarray of shape (n_samples, n_features)
+    >- measurements of all sensors, e.g., `X_model` of `RFchannel`
+    >
+    >__n_rx__ : int
+    >- number of sensors
+    >
+    >__n_meas_array__ : ndarray of shape (n_types,)
+    >- number of each type of measurements, see `HFF_k_matrix`
+    >
+    >__diff_types__ : sequence of boolean of shape (n_types,)
+    >- whether columns of each type are sensor pairs (differential
+    >    measurements in order of `itertools.combinations`, as in
+    >    `generate_Xmodel`) or sensors
+    >
+    >__kernel__ : str, default = 'laplacian'
+    >- 'laplacian' or 'rbf', see `HFF_dist_cache`
+    >
+    >__dtype__ : numpy dtype, default = np.float64
+    >- data type of contributions, np.float32 halves memory footprint
+    """
+
+    def __init__(self, X, n_rx, n_meas_array, diff_types, kernel='laplacian', dtype=np.float64):
+        if kernel not in _HFF_DIST_FUNCS:
+            raise ValueError('kernel {} not supported, options are {}'.format(repr(kernel), list(_HFF_DIST_FUNCS)))
+        if len(diff_types) != len(n_meas_array):
+            raise ValueError("Number of diff_types,{:d}, doesn't match number of feature types, {:d}".format(len(diff_types), len(n_meas_array)))
+        self.X = check_array(X)
+        self.n_rx = n_rx
+        self.n_meas_array = np.asarray(n_meas_array)
+        self.kernel = kernel
+        self.idx_ = np.concatenate(([0], np.cumsum(self.n_meas_array)))
+        if self.idx_[-1] != self.X.shape[1]:
+            raise ValueError("Sum of n_meas_array is not same as number of features in X")
+
+        #sensors of each column
+        self.col_sensors_ = []
+        for n_meas, diff in zip(self.n_meas_array, diff_types):
+            sensors = list(combinations(range(n_rx), 2)) if diff else [(s,) for s in range(n_rx)]
+            if n_meas != len(sensors):
+                raise ValueError('{} measurements of type not {} {}'.format(n_meas, len(sensors), 'sensor pairs' if diff else 'sensors'))
+            self.col_sensors_ += sensors
+
+        #distance contributions of each column
+        n_samples = self.X.shape[0]
+        self.contribs_ = np.empty((self.X.shape[1], n_samples, n_samples), dtype=dtype)
+        for c in range(self.X.shape[1]):
+            self.contribs_[c] = _HFF_DIST_FUNCS[kernel](self.X[:, c:c+1], self.X[:, c:c+1])
+        #distances over all sensors and contributions of each sensor (a column if per-sensor type)
+        self.totals_, self.sensor_sums_ = [], []
+        for start, stop in zip(self.idx_[:-1], self.idx_[1:]):
+            self.totals_.append(self._sum_contribs(range(start, stop)))
+            sensor_cols = [[c for c in range(start, stop) if s in self.col_sensors_[c]] for s in range(n_rx)]
+            self.sensor_sums_.append([self.contribs_[cols[0]] if len(cols) == 1 else self._sum_contribs(cols)
+                                      for cols in sensor_cols])
+
+    def _sum_contribs(self, cols):
+        """Returns sum of contributions of columns `cols`, accumulated in
+        place"""
+        D = np.zeros(self.contribs_.shape[1:])
+        for c in cols:
+            D += self.contribs_[c]
+        return D
+
+    def columns(self, sensors):
+        """Returns columns of `X` kept with `sensors` and number of kept
+        measurements of each type"""
+        keep = np.array([all(s in sensors for s in cs) for cs in self.col_sensors_])
+        n_meas = np.array([np.sum(keep[start:stop]) for start, stop in zip(self.idx_[:-1], self.idx_[1:])])
+        if np.any(n_meas == 0):
+            raise ValueError('sensors {} leave measurement types without measurements, {}'.format(list(sensors), n_meas))
+        return np.flatnonzero(keep), n_meas
+
+    def subset(self, sensors):
+        """
+        Returns measurements and distances of subset of `sensors`.
+
+        __Parameters__
+
+        > __sensors__ : sequence of int
+        >- indices of kept sensors
+
+        __Returns__
+
+        > __X_sub__ : ndarray of shape (n_samples, n_features of subset)
+        >- kept columns of `X`
+        >
+        > __n_meas_sub__ : ndarray of shape (n_types,)
+        >- number of each type of kept measurements
+        >
+        > __dists__ : HFF_fold_dists
+        >- distances of each type of `X_sub`, pass as `cache_dist` of
+        >    kernel trick regressors fit on (rows of) `X_sub`
+        """
+        cols, n_meas = self.columns(sensors)
+        X_sub = self.X[:, cols]
+        dists = HFF_fold_dists(X_sub)
+        idx_sub = np.concatenate(([0], np.cumsum(n_meas)))
+        dropped = [s for s in range(self.n_rx) if s not in sensors]
+        for m, (start, stop) in enumerate(zip(self.idx_[:-1], self.idx_[1:])):
+            kept = [c for c in cols if start <= c < stop]
+            #pairs of two dropped sensors are subtracted twice
+            both_dropped = [c for c in range(start, stop)
+                            if len(self.col_sensors_[c]) == 2 and all(s in dropped for s in self.col_sensors_[c])]
+            #subtract dropped sensors from total or add kept columns, whichever is fewer arrays
+            if len(dropped) + len(both_dropped) < len(kept):
+                D = self.totals_[m] - self.sensor_sums_[m][dropped[0]] if dropped else self.totals_[m]
+                for s in dropped[1:]:
+                    D -= self.sensor_sums_[m][s]
+                for c in both_dropped:
+                    D += self.contribs_[c]
+            else:
+                D = self._sum_contribs(kept)
+            dists.full_dists_[(idx_sub[m], idx_sub[m+1], self.kernel)] = D
+        return X_sub, n_meas, dists
+
+# Cell
+class HFF_kernel_approx(BaseEstimator, TransformerMixin):
+    """
+    Low rank approximation of the kernelized matrix of `HFF_k_matrix`.
+    Each measurement type (block of `num_meas_array`) is mapped to a
+    fixed width feature map, `phi`, such that `phi(fm) phi(fml)^T`
+    approximates the kernel of that type.  Kernel trick regressors
+    then fit linear models on the hstacked feature maps, so fit and
+    predict scale linearly with number of samples rather than with
+    size of the dictionary.
+
+    Feature maps are either Nyström (random subset of dictionary rows
+    as landmarks, any kernel) or random features (random Fourier
+    features with Gaussian frequencies for 'rbf' and Cauchy frequencies
+    for 'laplacian').  If `normalize_rows`, features are scaled by the
+    norm of the approximated kernel row against data seen in fit, same
+    as the L2 normalization of kernel rows in the kernel trick
+    regressors.
+
+    __Parameters__
+
+    >__kernel__ : str, default = 'laplacian'
+    >- kernel of each measurement type, see `HFF_k_matrix`.  Random
+    >    features support 'rbf' and 'laplacian'.
+    >
+    >__num_meas_array__ : ndarray of shape  (n_types of measurements,), default = np.array([])
+    >- number of each type of measurements, see `HFF_k_matrix`
+    >
+    >__varMs__ : ndarray of shape (n_types of measurements,), default = np.array([])
+    >- kernel scale of each measurement type, see `HFF_k_matrix`
+    >
+    >__n_components__ : integer, default = 100
+    >- width of feature map (rank of approximation) per measurement type
+    >
+    >__method__ : str, default = 'nystroem'
+    >- 'nystroem' for Nyström landmarks or 'rff' for random features
+    >
+    >__normalize_rows__ : boolean, default = True
+    >- whether to normalize features by norm of approximated kernel row
+    >
+    >__dtype__ : numpy dtype, default = np.float64
+    >- data type of feature maps
+    >
+    >__random_state__ : int, default = None
+    >- set for reproducible landmarks/random features
+    """
+
+    def __init__(self, kernel='laplacian', num_meas_array=np.array([]), varMs=np.array([]),
+                 n_components=100, method='nystroem', normalize_rows=True,
+                 dtype=np.float64, random_state=None):
+        self.kernel = kernel
+        self.num_meas_array = num_meas_array
+        self.varMs = varMs
+        self.n_components = n_components
+        self.method = method
+        self.normalize_rows = normalize_rows
+        self.dtype = dtype
+        self.random_state = random_state
+
+    def fit(self, X, y=None):
+        """
+        Fits feature map of each measurement type to reference
+        measurements `X` (n_samples, n_features).
+
+        __Returns__
+
+        > Self, sets self.maps_, self.grams_ (if normalize_rows)
+        """
+        X = check_array(X)
+        num_meas_array, varMs = np.asarray(self.num_meas_array), np.asarray(self.varMs)
+        if num_meas_array.size == 0:
+            num_meas_array = np.array([X.shape[1]])
+        if varMs.size == 0:
+            varMs = np.ones(num_meas_array.size)
+        if num_meas_array.size != varMs.size:
+            raise ValueError("Number of scales,{:d}, doesn't match number of feature types, {:d}".format(varMs.size, num_meas_array.size))
+        if self.method not in ('nystroem', 'rff'):
+            raise ValueError("{} method not supported, use 'nystroem' or 'rff'".format(repr(self.method)))
+        if self.method == 'rff' and self.kernel not in ('rbf', 'laplacian'):
+            raise ValueError("rff method only supports 'rbf' and 'laplacian' kernels")
+        rng = np.random.default_rng(self.random_state)
+        self.idx_ = np.concatenate(([0], np.cumsum(num_meas_array)))
+
+        #fit feature map of each measurement type
+        self.maps_ = []
+        for m in range(num_meas_array.size):
+            X_type = X[:, self.idx_[m]:self.idx_[m+1]]
+            if self.method == 'nystroem':
+                self.maps_.append(Nystroem(kernel=self.kernel, gamma=varMs[m],
+                                           n_components=min(self.n_components, X.shape[0]),
+                                           random_state=rng.integers(2**31)).fit(X_type))
+            else:
+                #frequencies from Fourier transform of kernel: Gaussian (rbf), Cauchy (laplacian)
+                if self.kernel == 'rbf':
+                    W = rng.normal(scale=np.sqrt(2*varMs[m]), size=(X_type.shape[1], self.n_components))
+                else:
+                    W = varMs[m]*rng.standard_cauchy(size=(X_type.shape[1], self.n_components))
+                self.maps_.append((W, rng.uniform(0, 2*np.pi, size=self.n_components)))
+
+        #gram matrix of features of each type, gives norm of approximated kernel rows
+        self.widths_ = [self._map(m, X[:1]).shape[1] for m in range(len(self.maps_))]
+        self.grams_ = None
+        if self.normalize_rows:
+            self.grams_ = []
+            for m in range(len(self.maps_)):
+                phi = self._map(m, X)
+                self.grams_.append(phi.T @ phi)
+
+        return self
+
+    def _map(self, m, X):
+        """Feature map of measurement type `m` for (all columns of) `X`"""
+        X_type = X[:, self.idx_[m]:self.idx_[m+1]]
+        if self.method == 'nystroem':
+            return self.maps_[m].transform(X_type)
+        W, b = self.maps_[m]
+        phi = X_type @ W
+        phi += b
+        np.cos(phi, out=phi)
+        phi *= np.sqrt(2/W.shape[1])
+        return phi
+
+    def transform(self, X):
+        """
+        Maps measurements `X` (n_samples, n_features) to hstacked feature
+        maps of each measurement type.
+
+        __Returns__
+
+        > __phi__ : ndarray of shape (n_samples, n_types*n_components)
+        """
+        check_is_fitted(self)
+        X = check_array(X)
+        cols = np.concatenate(([0], np.cumsum(self.widths_)))
+        phi_all = np.empty((X.shape[0], cols[-1]), dtype=self.dtype)
+        row_norms = np.zeros(X.shape[0])
+        for m in range(len(self.maps_)):
+            phi = self._map(m, X)
+            phi_all[:, cols[m]:cols[m+1]] = phi
+            if self.normalize_rows:
+                #squared norm of approximated kernel row, phi G phi^T
+                row_norms += np.einsum('ij,ij->i', phi @ self.grams_[m], phi)
+        if self.normalize_rows:
+            row_norms = np.sqrt(np.maximum(row_norms, 0))
+            row_norms[row_norms == 0] = 1
+            phi_all /= row_norms[:, np.newaxis]
+        return phi_all
+
+# Cell
+class HFF_sparse_predictor:
+    """
+    Support-pruned predictor of a fitted linear model over an (un-
+    normalized) kernelized matrix of `HFF_k_matrix`.  Sparse models
+    (e.g., Lasso or glmnet with `glm_alpha=1`) have mostly zero
+    coefficients, so only dictionary rows, per measurement type, with
+    a nonzero coefficient in any output dimension are kept.  Predict
+    then only computes kernel columns of those rows and skips types
+    without any.
+
+    Note that L2 normalized kernel rows (default of the kernel trick
+    regressors) need every kernel column for the norm of each row, so
+    pruning is exact only for models fit with `kernel_normalize=False`.
+
+    __Parameters__
+
+    >__fml__ : ndarray of shape (n_examples, n_features)
+    >- dictionary of reference measurements the model was fit on
+    >
+    >__coef__ : ndarray of shape (n_targets, n_types*n_examples) or (n_types*n_examples,)
+    >- coefficients of linear model over kernelized matrix
+    >
+    >__intercept__ : float or ndarray of shape (n_targets,)
+    >- intercept of linear model
+    >
+    >__kernel__, __num_meas_array__, __varMs__, __dtype__
+    >- see `HFF_k_matrix`
+    """
+
+    def __init__(self, fml, coef, intercept, kernel='laplacian', num_meas_array=np.array([]),
+                 varMs=np.array([]), dtype=np.float64):
+        if np.size(num_meas_array) == 0:
+            num_meas_array = np.array([fml.shape[1]])
+        if np.size(varMs) == 0:
+            varMs = np.ones(np.size(num_meas_array))
+        self.kernel = kernel
+        self.dtype = dtype
+        self.single_output = (np.ndim(coef) == 1)
+        coef = np.atleast_2d(coef)
+        self.intercept = np.atleast_1d(intercept).astype(np.float64)
+        n_fml = fml.shape[0]
+        idx = np.concatenate(([0], np.cumsum(num_meas_array)))
+
+        #keep dictionary rows (and types) with any nonzero coefficient
+        self.types_ = []
+        for m in range(np.size(num_meas_array)):
+            coef_type = coef[:, m*n_fml:(m+1)*n_fml]
+            support = np.flatnonzero(np.any(coef_type != 0, axis=0))
+            if support.size:
+                self.types_.append((slice(idx[m], idx[m+1]), varMs[m],
+                                    np.ascontiguousarray(fml[support, idx[m]:idx[m+1]], dtype=dtype),
+                                    np.ascontiguousarray(coef_type[:, support].T)))
+        self.n_support_ = sum(t[2].shape[0] for t in self.types_)
+
+    def predict(self, X):
+        """Returns estimates of measurements `X` (n_samples, n_features)
+        using only kernel columns of supported dictionary rows"""
+        X = np.asarray(X, dtype=self.dtype)
+        y_pred = np.tile(self.intercept, (X.shape[0], 1))
+        for cols, scale, fml_support, coef_support in self.types_:
+            t0 = _tic()
+            k_support = pairwise_kernels(X[:, cols], fml_support, metric=self.kernel, gamma=scale)
+            _toc('kernel', t0, k_support, source='HFF_sparse_predictor')
+            t0 = _tic()
+            y_pred += k_support @ coef_support
+            _toc('solve', t0, y_pred, nbytes=0, source='HFF_sparse_predictor')
+        return y_pred[:, 0] if self.single_output else y_pred
+
+def _glmnet_coef(fit, i_lambda=0):
+    """Returns coefficients, (n_targets, n_features) or (n_features,) for
+    single target, and intercept of glmnet `fit` at `i_lambda`th lambda"""
+    if fit['class'] == 'mrelnet':
+        coef = np.stack([np.asarray(beta)[:, i_lambda] for beta in fit['beta']])
+        return coef, np.asarray(fit['a0'])[:, i_lambda]
+    return np.asarray(fit['beta'])[:, i_lambda], np.asarray(fit['a0'])[i_lambda]
+
+# Cell
+class HFF_sharded_predictor:
+    """
+    Parallel predictor of a fitted linear model over the kernelized
+    matrix of `HFF_k_matrix` (optionally L2 normalized by row).  Rows of
+    the dictionary are split into one shard per thread.  Measurements
+    and coefficients of each measurement type are made contiguous once,
+    and shards are views of them shared by all threads, so nothing is
+    copied per call or per thread.
+
+    For each block of rows of `X`, every shard computes kernel columns of
+    its dictionary rows for all measurement types, their product with
+    the coefficients and squared row norms.  Partials of all shards are
+    summed and divided by the norm of the full kernel row, which gives
+    the estimates of the normalized kernel matrix without forming it.
+    Kernels and products run in compiled code that releases the GIL.
+    The thread pool is started on first predict and reused by later
+    calls (it is not pickled).
+
+    __Parameters__
+
+    >__fml__, __coef__, __intercept__
+    >- see `HFF_sparse_predictor`
+    >
+    >__kernel__, __num_meas_array__, __varMs__, __dtype__
+    >- see `HFF_k_matrix`
+    >
+    >__normalize_rows__ : boolean, default = True
+    >- whether model was fit on L2 normalized kernel rows
+    >
+    >__n_jobs__ : integer, default = -1
+    >- number of threads (and shards), -1 uses all cores
+    >
+    >__max_bytes__ : integer, default = 2**28
+    >- memory budget (bytes) of kernel blocks of all shards, sets rows
+    >    of `X` per block
+    """
+
+    def __init__(self, fml, coef, intercept, kernel='laplacian', num_meas_array=np.array([]),
+                 varMs=np.array([]), dtype=np.float64, normalize_rows=True, n_jobs=-1, max_bytes=2**28):
+        if np.size(num_meas_array) == 0:
+            num_meas_array = np.array([fml.shape[1]])
+        if np.size(varMs) == 0:
+            varMs = np.ones(np.size(num_meas_array))
+        self.kernel = kernel
+        self.dtype = dtype
+        self.normalize_rows = normalize_rows
+        self.max_bytes = max_bytes
+        self.single_output = (np.ndim(coef) == 1)
+        coef = np.atleast_2d(coef)
+        self.intercept = np.atleast_1d(intercept).astype(np.float64)
+        n_fml = fml.shape[0]
+        idx = np.concatenate(([0], np.cumsum(num_meas_array)))
+
+        #contiguous measurements and coefficients of each type, once
+        self.types_ = [(slice(idx[m], idx[m+1]), varMs[m],
+                        np.ascontiguousarray(fml[:, idx[m]:idx[m+1]], dtype=dtype),
+                        np.ascontiguousarray(coef[:, m*n_fml:(m+1)*n_fml].T))
+                       for m in range(np.size(num_meas_array))]
+        #contiguous blocks of dictionary rows, one per thread
+        n_jobs = os.cpu_count() if (n_jobs is None) or (n_jobs < 0) else n_jobs
+        bounds = np.linspace(0, n_fml, max(min(n_jobs, n_fml), 1)+1).astype(int)
+        self.shards_ = [slice(start, stop) for start, stop in zip(bounds[:-1], bounds[1:])]
+        self._pool, self._pool_lock = None, threading.Lock()
+
+    def __getstate__(self):
+        #threads and lock are not pickled, pool restarts on first predict
+        state = self.__dict__.copy()
+        state['_pool'], state['_pool_lock'] = None, None
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._pool_lock = threading.Lock()
+
+    def _get_pool(self):
+        """Returns thread pool of shards, started once"""
+        with self._pool_lock:
+            if self._pool is None:
+                self._pool = ThreadPoolExecutor(max_workers=len(self.shards_))
+            return self._pool
+
+    def _shard(self, X_types, shard):
+        """Partial estimates and squared norms of kernel rows of `X_types`
+        (measurements of each type) over dictionary rows `shard`"""
+        y_part = np.zeros((X_types[0].shape[0], self.intercept.size))
+        sq_part = np.zeros(X_types[0].shape[0])
+        for X_type, (_, scale, fml_type, coef_type) in zip(X_types, self.types_):
+            k_block = pairwise_kernels(X_type, fml_type[shard], metric=self.kernel, gamma=scale)
+            y_part += k_block @ coef_type[shard]
+            if self.normalize_rows:
+                sq_part += np.einsum('ij,ij->i', k_block, k_block)
+        return y_part, sq_part
+
+    def predict(self, X):
+        """Returns estimates of measurements `X` (n_samples, n_features),
+        dictionary shards computed in parallel threads"""
+        X = np.asarray(X, dtype=self.dtype)
+        n_samples, n_fml = X.shape[0], self.types_[0][2].shape[0]
+        #rows per block, kernel (and float64 temporary) of one type over all shards within budget
+        n_rows = int(min(max(self.max_bytes // (n_fml*(np.dtype(self.dtype).itemsize + 8)), 1), max(n_samples, 1)))
+        y_pred = np.empty((n_samples, self.intercept.size))
+        pool = self._get_pool()
+        for start in range(0, n_samples, n_rows):
+            rows = slice(start, min(start+n_rows, n_samples))
+            X_types = [np.ascontiguousarray(X[rows, cols]) for cols, _, _, _ in self.types_]
+            t0 = _tic()
+            partials = list(pool.map(lambda shard: self._shard(X_types, shard), self.shards_))
+            _toc('kernel', t0, *partials[0], nbytes=sum(y_part.nbytes + sq_part.nbytes for y_part, sq_part in partials),
+                 source='HFF_sharded_predictor')
+            #sum partials of shards, scale by norm of full kernel row
+            t0 = _tic()
+            y_block, sq_block = partials[0]
+            for y_part, sq_part in partials[1:]:
+                y_block += y_part
+                sq_block += sq_part
+            if self.normalize_rows:
+                norms = np.sqrt(sq_block)
+                norms[norms == 0] = 1
+                y_block /= norms[:, np.newaxis]
+            y_pred[rows] = y_block + self.intercept
+            _toc('reduce', t0, y_block, nbytes=0, source='HFF_sharded_predictor')
+        return y_pred[:, 0] if self.single_output else y_pred
+
 # Cell
 def mse_EucDistance(yV, yVhat):
     """Scoring function to calculate the mean physical distance error of
@@ -111,6 +919,104 @@ def mse_EucDistance(yV, yVhat):
     return mse
 
 
+def _path_scores(y, y_path):
+    """Returns `mse_EucDistance` (mean squared error for single target) of
+    each estimate along last axis of `y_path`, e.g., a regularization path"""
+    if y_path.ndim == 2:
+        y_path = y_path[:, np.newaxis]
+    y = np.asarray(y).reshape(y_path.shape[0], -1)
+    if y.shape[1] == 1:
+        return np.array([mean_squared_error(y[:, 0], y_path[:, 0, i]) for i in range(y_path.shape[-1])])
+    return np.array([mse_EucDistance(y, y_path[..., i]) for i in range(y_path.shape[-1])])
+
+# Cell
+def _split_kernel(k_raw, idx_train, idx_val, n_types, normalize_rows=True, exact=True):
+    """Slices train/validation kernel of split `idx_train`/`idx_val` from
+    (unnormalized) kernelized matrix `k_raw` of all data, so split does
+    not recompute kernel.  Dictionary of exact kernel is only the
+    training rows of each of `n_types` measurement types."""
+    if not exact:
+        return k_raw[idx_train], k_raw[idx_val]
+    n = k_raw.shape[0]
+    cols = np.concatenate([m*n + idx_train for m in range(n_types)])
+    k_train, k_val = k_raw[np.ix_(idx_train, cols)], k_raw[np.ix_(idx_val, cols)]
+    if normalize_rows:
+        normalize(k_train, copy=False)
+        normalize(k_val, copy=False)
+    return k_train, k_val
+
+def _linear_path(model, k_train, y, k_pred, alphas):
+    """
+    Fits sklearn linear `model` (Ridge, Lasso or ElasticNet) to kernelized
+    matrix `k_train` for each of `alphas` (decreasing) and returns
+    estimates of `k_pred` of shape (n_pred, n_alphas) or (n_pred,
+    n_targets, n_alphas).  Lasso/ElasticNet use warm started coordinate
+    descent (`enet_path`) per target and Ridge uses a single
+    eigendecomposition of the (centered) gram matrix for all alphas.
+    """
+    y2d = y.reshape(y.shape[0], -1)
+    #center, same as fit_intercept of sklearn linear models
+    k_mean = k_train.mean(axis=0) if model.fit_intercept else np.zeros(k_train.shape[1])
+    y_mean = y2d.mean(axis=0) if model.fit_intercept else np.zeros(y2d.shape[1])
+    k_c = k_train - k_mean
+    y_c = y2d - y_mean
+    k_pred_c = k_pred - k_mean
+    y_path = np.empty((k_pred.shape[0], y2d.shape[1], alphas.size))
+
+    if isinstance(model, Ridge):
+        #dual solution, coef = k_c^T U (S + alpha)^-1 U^T y_c, with k_c k_c^T = U S U^T
+        s, U = np.linalg.eigh(k_c @ k_c.T)
+        s = np.maximum(s, 0)
+        Uty = U.T @ y_c
+        k_pred_U = (k_pred_c @ k_c.T) @ U
+        for i, alpha in enumerate(alphas):
+            y_path[..., i] = k_pred_U @ (Uty / (s + alpha)[:, np.newaxis])
+    elif isinstance(model, ElasticNet) and not isinstance(model, MultiTaskElasticNet):
+        #independent path per target, same as Lasso/ElasticNet fit
+        k_c = np.asfortranarray(k_c)
+        for j in range(y2d.shape[1]):
+            _, coefs, _ = enet_path(k_c, y_c[:, j], l1_ratio=model.l1_ratio, alphas=alphas,
+                                    max_iter=model.max_iter, tol=model.tol)
+            y_path[:, j] = k_pred_c @ coefs
+    else:
+        raise ValueError("path only supported for Ridge, Lasso and ElasticNet models, got {}".format(type(model).__name__))
+
+    y_path += y_mean[:, np.newaxis]
+    return y_path[:, 0] if y.ndim == 1 else y_path
+
+def _ridge_loo_path(model, k_train, y, alphas):
+    """
+    Exact leave-one-out (LOO) estimates of sklearn Ridge `model` fit to
+    kernelized matrix `k_train` for each of `alphas` from a single
+    eigendecomposition of the (centered) gram matrix, `k_c k_c^T = U S
+    U^T`.  Ridge is a linear smoother, `y_hat = H y`, so LOO residuals
+    are `(y - y_hat)/(1 - diag(H))` with `H = 11^T/n + U S(S +
+    alpha)^-1 U^T` (first term only with intercept).  Note that the
+    dictionary (kernel columns) still includes each left out sample.
+
+    Returns estimates of shape (n_samples, n_alphas) or (n_samples,
+    n_targets, n_alphas).
+    """
+    y2d = y.reshape(y.shape[0], -1)
+    n = k_train.shape[0]
+    #center, same as fit_intercept of sklearn linear models
+    if model.fit_intercept:
+        k_c = k_train - k_train.mean(axis=0)
+        y_c = y2d - y2d.mean(axis=0)
+    else:
+        k_c, y_c = k_train, y2d
+    s, U = np.linalg.eigh(k_c @ k_c.T)
+    s = np.maximum(s, 0)
+    Uty = U.T @ y_c
+    U_sq = U**2
+    y_loo = np.empty((n, y2d.shape[1], alphas.size))
+    for i, alpha in enumerate(alphas):
+        shrink = s/(s + alpha)
+        h_diag = U_sq @ shrink + (1/n if model.fit_intercept else 0)
+        resid = y_c - U @ (shrink[:, np.newaxis]*Uty)
+        y_loo[..., i] = y2d - resid/(1 - h_diag)[:, np.newaxis]
+    return y_loo[:, 0] if y.ndim == 1 else y_loo
+
 # Cell
 class sklearn_kt_regressor(BaseEstimator):
     """
@@ -142,11 +1048,57 @@ class sklearn_kt_regressor(BaseEstimator):
     >    (112ea TDOA, 16ea RSS, 8ea AoA is np.array([112,16,8])).  Note
     >    that if one measurement then defaults to simply pairwise_kernel
     >    for entire dictionary.
+    >
+    >__kernel_dtype__ : numpy dtype, default = np.float64
+    >- data type of kernelized matrix used in fit and predict,
+    >    np.float32 halves memory footprint
+    >
+    >__kernel_max_bytes__ : integer, default = 2**28
+    >- memory budget (bytes) for blocks of kernelized matrix used in
+    >    predict, see `HFF_k_matrix_tiles`
+    >
+    >__cache_dist__ : boolean or HFF_dist_cache, default = False
+    >- whether to reuse distance matrices of each measurement type
+    >    from `default_dist_cache` (if True) or passed cache (see
+    >    `HFF_dist_cache` and `HFF_fold_dists`), speeds up sweeps over
+    >    kernel scales of 'laplacian' and 'rbf' kernels
+    >
+    >__kernel_approx__ : str, default = None
+    >- approximate kernelized matrix with fixed width feature maps of
+    >    each measurement type, 'nystroem' or 'rff' (random features),
+    >    see `HFF_kernel_approx`.  If None, exact kernel is used.
+    >
+    >__n_components__ : integer, default = 100
+    >- width of feature map (rank) per measurement type if `kernel_approx`
+    >
+    >__random_state__ : int, default = None
+    >- set for reproducible feature maps if `kernel_approx`
+    >
+    >__kernel_normalize__ : boolean, default = True
+    >- whether to L2 normalize rows of kernelized matrix.  If False,
+    >    predict of sparse models only computes kernel columns of
+    >    dictionary rows with nonzero coefficients, see
+    >    `HFF_sparse_predictor`
+    >
+    >__skl_alphas__ : ndarray, default = None
+    >- if set, `fit` selects alpha of `skl_model` along path of
+    >    `skl_alphas` (see `fit_path`).  For Ridge, selection is by
+    >    exact leave-one-out error of one eigendecomposition, so search
+    >    tools only search kernel parameters.
+    >
+    >__n_jobs__ : integer, default = None
+    >- threads of predict for exact kernel, each computing a shard of
+    >    dictionary rows (see `HFF_sharded_predictor`), -1 uses all
+    >    cores.  If None, predict kernelizes blocks of rows in calling
+    >    thread.
     """
 
     def __init__(self, skl_model=Lasso(), skl_kernel='laplacian', n_kernels=1,
                  kernel_s0 = 1e-3, kernel_s1 = None, kernel_s2 = None,
-                 n_meas_array=np.array([])):
+                 n_meas_array=np.array([]), kernel_dtype=np.float64,
+                 kernel_max_bytes=2**28, cache_dist=False, kernel_approx=None,
+                 n_components=100, random_state=None, kernel_normalize=True,
+                 skl_alphas=None, n_jobs=None):
         self.skl_model = skl_model
         self.skl_kernel = skl_kernel
         self.n_kernels = n_kernels
@@ -154,15 +1106,24 @@ class sklearn_kt_regressor(BaseEstimator):
         self.kernel_s1 = kernel_s1
         self.kernel_s2 = kernel_s2
         self.n_meas_array = n_meas_array
-
+        self.kernel_dtype = kernel_dtype
+        self.kernel_max_bytes = kernel_max_bytes
+        self.cache_dist = cache_dist
+        self.kernel_approx = kernel_approx
+        self.n_components = n_components
+        self.random_state = random_state
+        self.kernel_normalize = kernel_normalize
+        self.skl_alphas = skl_alphas
+        self.n_jobs = n_jobs
+
+    @_timed('fit', reset=True)
     def fit(self, X, y):
         """
         Kernelizes passed data and then fits data according to passed
         model.  Function inherits all attributes and features of
         SKLearn's base esimator class as well as passed model.  As part
         of fit process, feature data is kernelized (based on instance
-        kernel parameter) and normalized -- should parameterize
-        normalization or functionalize both together outside `fit`.
+        kernel parameter) and normalized (if `kernel_normalize`).
 
         __Parameters__
 
@@ -175,12 +1136,20 @@ class sklearn_kt_regressor(BaseEstimator):
 
         __Returns__
 
-        > Self, sets self.X_, self.Y_
+        > Self, sets self.X_, self.Y_, self.kernel_map_,
+        > self.sparse_predictor_, self.sharded_predictor_, self.timings_
+        > (stages of fit if profiled, see `stage_profiler`)
 
         """
 
+        #select alpha along path
+        if self.skl_alphas is not None:
+            return self.fit_path(X, y, self.skl_alphas)
+
         # Check that X and y have correct shape
+        t0, X_in, y_in = _tic(), X, y
         X, y = check_X_y(X, y, multi_output=True)
+        _toc('validate', t0, X, y, nbytes=_copied_bytes((X, X_in), (y, y_in)))
         # Check that number of kernels and number of kernel scales is same
         if self.n_kernels != len(self.n_meas_array):
             raise ValueError("n_kernels is not same as number of n_meas_array")
@@ -193,15 +1162,58 @@ class sklearn_kt_regressor(BaseEstimator):
         for i in range(1,self.n_kernels):
             kernel_scales = np.append(kernel_scales,self.get_params()["kernel_s"+str(i)])
 
-        # Generate kernelized matrix for fit input
-        X_kernel = HFF_k_matrix(fml=X, kernel=self.skl_kernel,
-                                num_meas_array=self.n_meas_array,
-                                varMs=kernel_scales)
-        #normalize
-        X_kernel = Normalizer().fit_transform(X_kernel)
-
+        # Generate (approximate) kernelized matrix for fit input
+        if self.kernel_approx is not None:
+            t0 = _tic()
+            self.kernel_map_ = HFF_kernel_approx(kernel=self.skl_kernel,
+                                    num_meas_array=self.n_meas_array,
+                                    varMs=kernel_scales, n_components=self.n_components,
+                                    method=self.kernel_approx, normalize_rows=self.kernel_normalize,
+                                    dtype=self.kernel_dtype, random_state=self.random_state).fit(X)
+            X_kernel = self.kernel_map_.transform(X)
+            _toc('kernel', t0, X_kernel)
+        else:
+            self.kernel_map_ = None
+            X_kernel = HFF_k_matrix(fml=X, kernel=self.skl_kernel,
+                                    num_meas_array=self.n_meas_array,
+                                    varMs=kernel_scales, dtype=self.kernel_dtype,
+                                    dist_cache=_get_dist_cache(self.cache_dist))
+            #normalize
+            if self.kernel_normalize:
+                t0 = _tic()
+                X_kernel = normalize(X_kernel, copy=False)
+                _toc('normalize', t0, X_kernel, nbytes=0)
+
+        return self._fit_kernel(X, y, X_kernel, kernel_scales)
+
+    def _fit_kernel(self, X, y, X_kernel, kernel_scales):
+        """Fits model to kernelized matrix `X_kernel` of `X` and stores
+        data seen during fit"""
         # Fit
+        t0 = _tic()
         self.skl_model.fit(X_kernel, y)
+        _toc('solve', t0)
+
+        #prune unnormalized exact kernel to support of linear models
+        self.sparse_predictor_ = None
+        if (self.kernel_map_ is None) and not self.kernel_normalize and hasattr(self.skl_model, 'coef_'):
+            t0 = _tic()
+            self.sparse_predictor_ = HFF_sparse_predictor(X, self.skl_model.coef_,
+                                        self.skl_model.intercept_, kernel=self.skl_kernel,
+                                        num_meas_array=self.n_meas_array, varMs=kernel_scales,
+                                        dtype=self.kernel_dtype)
+            _toc('prune', t0, *(a for t in self.sparse_predictor_.types_ for a in t[2:]))
+
+        #shard dictionary of exact kernel for parallel predict
+        self.sharded_predictor_ = None
+        if (self.n_jobs is not None) and (self.kernel_map_ is None) and (self.sparse_predictor_ is None) and hasattr(self.skl_model, 'coef_'):
+            t0 = _tic()
+            self.sharded_predictor_ = HFF_sharded_predictor(X, self.skl_model.coef_,
+                                        self.skl_model.intercept_, kernel=self.skl_kernel,
+                                        num_meas_array=self.n_meas_array, varMs=kernel_scales,
+                                        dtype=self.kernel_dtype, normalize_rows=self.kernel_normalize,
+                                        n_jobs=self.n_jobs, max_bytes=self.kernel_max_bytes)
+            _toc('shard', t0, *(a for t in self.sharded_predictor_.types_ for a in t[2:]))
 
         # Store X,y seen during fit
         self.X_ = X
@@ -210,13 +1222,143 @@ class sklearn_kt_regressor(BaseEstimator):
         # Return the regressor
         return self
 
+    @_timed('fit', reset=True)
+    def fit_path(self, X, y, alphas, X_val=None, y_val=None, val_size=0.2):
+        """
+        Kernelizes passed data once and fits `skl_model` (Ridge, Lasso or
+        ElasticNet) along a path of `alphas`.  Lasso/ElasticNet use warm
+        started coordinate descent and Ridge a single eigendecomposition
+        for all alphas.  Each alpha is scored with `mse_EucDistance`
+        (mean squared error for single target) on validation data and
+        `skl_model` is then fit on all data at best alpha.
+
+        __Parameters__
+
+        > __X__ : ndarray of shape (n_samples, n_features)
+        >- Training data
+        >
+        > __y__ : ndarray of shape (n_samples, spatial dimensions)
+        >- Response data (location of Tx for each sample set
+        >  of measurements)
+        >
+        > __alphas__ : ndarray of shape (n_alphas,)
+        >- alphas (penalty) of `skl_model` to fit
+        >
+        > __X_val__, __y_val__ : ndarray, default = None
+        >- validation data.  If None, Ridge is scored by exact
+        >  leave-one-out estimates (from same eigendecomposition) and
+        >  other models hold out `val_size` fraction of training data
+        >  (split set by `random_state`) by slicing the kernelized
+        >  matrix of training data
+        >
+        > __val_size__ : float, default = 0.2
+        >- fraction of training data held out if no validation data
+
+        __Returns__
+
+        > Self, sets same as `fit` as well as self.alphas_ (decreasing),
+        > self.path_scores_ (validation score of each alpha) and
+        > self.alpha_best_
+
+        """
+
+        # Check that X and y have correct shape
+        t0, X_in, y_in = _tic(), X, y
+        X, y = check_X_y(X, y, multi_output=True)
+        _toc('validate', t0, X, y, nbytes=_copied_bytes((X, X_in), (y, y_in)))
+        # Check that number of kernels and number of kernel scales is same
+        if self.n_kernels != len(self.n_meas_array):
+            raise ValueError("n_kernels is not same as number of n_meas_array")
+        # Check that number of each measurement types is correct
+        if sum(self.n_meas_array) != X.shape[1]:
+            raise ValueError("Sum of n_meas_array is not same as number of features in X")
+
+        #put kernel scales together (reset in case called multiple times)
+        kernel_scales = np.array([self.kernel_s0])
+        for i in range(1,self.n_kernels):
+            kernel_scales = np.append(kernel_scales,self.get_params()["kernel_s"+str(i)])
+        #path order of alphas
+        self.alphas_ = -np.sort(-np.atleast_1d(np.asarray(alphas, dtype=np.float64)))
+
+        # Generate (approximate) kernelized matrix once
+        if self.kernel_approx is not None:
+            t0 = _tic()
+            self.kernel_map_ = HFF_kernel_approx(kernel=self.skl_kernel,
+                                    num_meas_array=self.n_meas_array,
+                                    varMs=kernel_scales, n_components=self.n_components,
+                                    method=self.kernel_approx, normalize_rows=self.kernel_normalize,
+                                    dtype=self.kernel_dtype, random_state=self.random_state).fit(X)
+            X_kernel = X_kernel_raw = self.kernel_map_.transform(X)
+            _toc('kernel', t0, X_kernel)
+        else:
+            self.kernel_map_ = None
+            X_kernel = X_kernel_raw = HFF_k_matrix(fml=X, kernel=self.skl_kernel,
+                                    num_meas_array=self.n_meas_array,
+                                    varMs=kernel_scales, dtype=self.kernel_dtype,
+                                    dist_cache=_get_dist_cache(self.cache_dist))
+            #normalize (keep unnormalized kernel for validation split)
+            if self.kernel_normalize:
+                t0 = _tic()
+                X_kernel = normalize(X_kernel_raw, copy=(X_val is None) and not isinstance(self.skl_model, Ridge))
+                _toc('normalize', t0, X_kernel, nbytes=(0 if X_kernel is X_kernel_raw else None))
+
+        #fit path on training data and estimate validation data
+        if (X_val is None) and isinstance(self.skl_model, Ridge):
+            t0 = _tic()
+            y_path = _ridge_loo_path(self.skl_model, X_kernel, y, self.alphas_)
+            _toc('path', t0, y_path)
+            y_val = y
+        elif X_val is None:
+            idx_train, idx_val = train_test_split(np.arange(X.shape[0]), test_size=val_size,
+                                                  random_state=self.random_state)
+            t0 = _tic()
+            k_train, k_val = _split_kernel(X_kernel_raw, idx_train, idx_val, self.n_kernels,
+                                           normalize_rows=self.kernel_normalize,
+                                           exact=(self.kernel_map_ is None))
+            _toc('normalize', t0, k_train, k_val)
+            t0 = _tic()
+            y_path = _linear_path(self.skl_model, k_train, y[idx_train], k_val, self.alphas_)
+            _toc('path', t0, y_path)
+            y_val = y[idx_val]
+            del k_train, k_val
+        else:
+            t0, X_in, y_in = _tic(), X_val, y_val
+            X_val, y_val = check_X_y(X_val, y_val, multi_output=True)
+            _toc('validate', t0, X_val, y_val, nbytes=_copied_bytes((X_val, X_in), (y_val, y_in)))
+            if self.kernel_map_ is not None:
+                t0 = _tic()
+                k_val = self.kernel_map_.transform(X_val)
+                _toc('kernel', t0, k_val)
+            else:
+                k_val = HFF_k_matrix(fml=X, fm=X_val, kernel=self.skl_kernel,
+                                     num_meas_array=self.n_meas_array,
+                                     varMs=kernel_scales, dtype=self.kernel_dtype)
+                if self.kernel_normalize:
+                    t0 = _tic()
+                    normalize(k_val, copy=False)
+                    _toc('normalize', t0, k_val, nbytes=0)
+            t0 = _tic()
+            y_path = _linear_path(self.skl_model, X_kernel, y, k_val, self.alphas_)
+            _toc('path', t0, y_path)
+            del k_val
+        del X_kernel_raw
+
+        #score path, fit all data at best alpha
+        self.path_scores_ = _path_scores(y_val, y_path)
+        self.alpha_best_ = self.alphas_[np.argmin(self.path_scores_)]
+        self.skl_model.set_params(alpha=self.alpha_best_)
+        return self._fit_kernel(X, y, X_kernel, kernel_scales)
+
+    @_timed(store=False)
     def predict(self, X):
         """
         Applies pair-wise kernel between observed with fitted data.  The
         predicts based on fitted model. As part of predict process,
         feature data is kernelized (based on instance kernel parameter)
-        and normalized -- should parameterize normalization or
-        functionalize both together outside `predict`.
+        and normalized (if `kernel_normalize`) in blocks of rows bounded
+        by `kernel_max_bytes`.  Unnormalized sparse models only kernelize
+        dictionary rows with nonzero coefficients.  If `n_jobs` is set,
+        shards of dictionary rows are computed in parallel threads.
 
         __Parameters__
 
@@ -234,23 +1376,41 @@ class sklearn_kt_regressor(BaseEstimator):
         check_is_fitted(self)
 
         # Input validation
+        t0, X_in = _tic(), X
         X = check_array(X)
+        _toc('validate', t0, X, nbytes=_copied_bytes((X, X_in)))
 
         #put kernel scales together (reset in case called multiple times)
         kernel_scales = np.array([self.kernel_s0])
         for i in range(1,self.n_kernels):
             kernel_scales = np.append(kernel_scales,self.get_params()["kernel_s"+str(i)])
 
-        #kernelize input
-        X_kernel = HFF_k_matrix(fml=self.X_, fm=X,
+        #approximate kernel, feature maps are linear in number of samples
+        if self.kernel_map_ is not None:
+            t0 = _tic()
+            X_kernel = self.kernel_map_.transform(X)
+            _toc('kernel', t0, X_kernel)
+            t0 = _tic()
+            y_pred = self.skl_model.predict(X_kernel)
+            _toc('solve', t0, y_pred)
+            return y_pred
+        #pruned kernel, only supported dictionary rows
+        if self.sparse_predictor_ is not None:
+            return self.sparse_predictor_.predict(X)
+        #shards of dictionary in parallel threads
+        if self.sharded_predictor_ is not None:
+            return self.sharded_predictor_.predict(X)
+
+        #kernelize input in blocks of rows, normalize and predict each block
+        tiles = HFF_k_matrix_tiles(fml=self.X_, fm=X,
                         kernel=self.skl_kernel,
                         num_meas_array=self.n_meas_array,
-                        varMs=kernel_scales)
-        #normalize
-        X_kernel = Normalizer().fit_transform(X_kernel)
+                        varMs=kernel_scales, max_bytes=self.kernel_max_bytes,
+                        dtype=self.kernel_dtype, normalize_rows=self.kernel_normalize,
+                        dist_cache=_get_dist_cache(self.cache_dist))
 
         #predict and return
-        return self.skl_model.predict(X_kernel)
+        return _tiled_predict(self.skl_model.predict, tiles, X.shape[0])
 
 # Cell
 class glmnet_kt_regressor(BaseEstimator):
@@ -271,10 +1431,12 @@ class glmnet_kt_regressor(BaseEstimator):
     >    - 1 is Lasso
     >    - (0,1) is ElasticNet
     >
-    >__lambdau__ : float, default = 1e-3
-    >- lambda for penalty (aka alpha in SKLearn). Note that this is
-    > converted to an ndarray internally due GLMnet accepting an
-    > array of lambda's.  **This is not supported with this wrapper!**
+    >__lambdau__ : float or ndarray, default = 1e-3
+    >- lambda(s) for penalty (aka alpha in SKLearn).  If an array, the
+    > whole (warm started) lambda path is fit in one GLMnet call on one
+    > kernelized matrix and the best lambda is selected on a validation
+    > split (see `lambda_val_size`), so sklearn search tools only search
+    > over kernel parameters.  See also `predict_path`.
     >
     >__skl_kernel__ : str, default = 'laplacian'
     >- This determines kernel used in kernel trick - see scikit-learn's
@@ -297,11 +1459,58 @@ class glmnet_kt_regressor(BaseEstimator):
     >
     >__glmnet_args__ : dictionary, default = {}
     >- parameters for underlying GLMnet object
+    >
+    >__kernel_dtype__ : numpy dtype, default = np.float64
+    >- data type of kernelized matrix, np.float32 halves memory
+    >    footprint of predict (blocks, pruned or sharded dictionary).
+    >    glmnet only fits np.float64, so kernelized matrix of fit is
+    >    cast to np.float64
+    >
+    >__kernel_max_bytes__ : integer, default = 2**28
+    >- memory budget (bytes) for blocks of kernelized matrix used in
+    >    predict, see `HFF_k_matrix_tiles`
+    >
+    >__cache_dist__ : boolean or HFF_dist_cache, default = False
+    >- whether to reuse distance matrices of each measurement type
+    >    from `default_dist_cache` (if True) or passed cache (see
+    >    `HFF_dist_cache` and `HFF_fold_dists`), speeds up sweeps over
+    >    kernel scales of 'laplacian' and 'rbf' kernels
+    >
+    >__kernel_approx__ : str, default = None
+    >- approximate kernelized matrix with fixed width feature maps of
+    >    each measurement type, 'nystroem' or 'rff' (random features),
+    >    see `HFF_kernel_approx`.  If None, exact kernel is used.
+    >
+    >__n_components__ : integer, default = 100
+    >- width of feature map (rank) per measurement type if `kernel_approx`
+    >
+    >__random_state__ : int, default = None
+    >- set for reproducible feature maps if `kernel_approx`
+    >
+    >__kernel_normalize__ : boolean, default = True
+    >- whether to L2 normalize rows of kernelized matrix.  If False,
+    >    predict of sparse models only computes kernel columns of
+    >    dictionary rows with nonzero coefficients, see
+    >    `HFF_sparse_predictor`
+    >
+    >__lambda_val_size__ : float, default = 0.2
+    >- fraction of fit data held out to select best of multiple
+    >    `lambdau` by `mse_EucDistance` (mean squared error for single
+    >    target).  Split is set by `random_state`.
+    >
+    >__n_jobs__ : integer, default = None
+    >- threads of predict for exact kernel, each computing a shard of
+    >    dictionary rows (see `HFF_sharded_predictor`), -1 uses all
+    >    cores.  If None, predict kernelizes blocks of rows in calling
+    >    thread.
     """
 
     def __init__(self, glm_alpha=1, lambdau=1e-3, skl_kernel='laplacian', n_kernels=1,
                  kernel_s0 = 1e-3, kernel_s1 = None, kernel_s2 = None,
-                 n_meas_array=np.array([]), glmnet_args = {}):
+                 n_meas_array=np.array([]), glmnet_args = {}, kernel_dtype=np.float64,
+                 kernel_max_bytes=2**28, cache_dist=False, kernel_approx=None,
+                 n_components=100, random_state=None, kernel_normalize=True,
+                 lambda_val_size=0.2, n_jobs=None):
         self.glm_alpha=glm_alpha
         self.lambdau=lambdau
         self.skl_kernel = skl_kernel
@@ -311,6 +1520,15 @@ class glmnet_kt_regressor(BaseEstimator):
         self.kernel_s2 = kernel_s2
         self.n_meas_array = n_meas_array
         self.glmnet_args = glmnet_args
+        self.kernel_dtype = kernel_dtype
+        self.kernel_max_bytes = kernel_max_bytes
+        self.cache_dist = cache_dist
+        self.kernel_approx = kernel_approx
+        self.n_components = n_components
+        self.random_state = random_state
+        self.kernel_normalize = kernel_normalize
+        self.lambda_val_size = lambda_val_size
+        self.n_jobs = n_jobs
 
     def set_glmnet_args(self, glmnet_args):
         """Enables setting any of glmnet params except alpha and lambdau
@@ -328,14 +1546,14 @@ class glmnet_kt_regressor(BaseEstimator):
 
         return self
 
+    @_timed('fit', reset=True)
     def fit(self, X, y):
         """
         Kernelizes passed data and then fits data according to passed
         model.  Function inherits all attributes and features of
         SKLearn's base esimator class as well as passed model.  As part
         of fit process, feature data is kernelized (based on instance
-        kernel parameter) and normalized -- should parameterize
-        normalization or functionalize both together outside `fit`.
+        kernel parameter) and normalized (if `kernel_normalize`).
 
         __Parameters__
 
@@ -348,12 +1566,19 @@ class glmnet_kt_regressor(BaseEstimator):
 
         __Returns__
 
-        > Self, sets self.X_, self.Y_
+        > Self, sets self.X_, self.Y_, self.kernel_map_,
+        > self.sparse_predictor_, self.sharded_predictor_, self.timings_
+        > (stages of fit if profiled, see `stage_profiler`), self.lambdau_ (fitted
+        > lambda path), self.lambda_idx_ and self.lambda_best_ (selected
+        > lambda), self.path_scores_ (validation score of each lambda, if
+        > multiple)
 
         """
 
         # Check that X and y have correct shape
+        t0, X_in, y_in = _tic(), X, y
         X, y = check_X_y(X, y, multi_output=True)
+        _toc('validate', t0, X, y, nbytes=_copied_bytes((X, X_in), (y, y_in)))
         # Check that number of kernels and number of kernel scales is same
         if self.n_kernels != len(self.n_meas_array):
             raise ValueError("n_kernels is not same as number of n_meas_array")
@@ -361,23 +1586,89 @@ class glmnet_kt_regressor(BaseEstimator):
         if sum(self.n_meas_array) != X.shape[1]:
             raise ValueError("Sum of n_meas_array is not same as number of features in X")
 
-        #put lambdau into ndarray
-        self.lambdau = np.array([self.lambdau])
+        #put lambdau into (decreasing) ndarray, glmnet path order
+        lambdau = -np.sort(-np.atleast_1d(np.asarray(self.lambdau, dtype=np.float64)))
         #put kernel scales together (reset in case called multiple times)
         kernel_scales = np.array([self.kernel_s0])
         for i in range(1,self.n_kernels):
             kernel_scales = np.append(kernel_scales,self.get_params()["kernel_s"+str(i)])
 
-        # Generate kernelized matrix for fit input
-        X_kernel = HFF_k_matrix(fml=X, kernel=self.skl_kernel,
-                                num_meas_array=self.n_meas_array,
-                                varMs=kernel_scales)
-        #normalize
-        X_kernel = Normalizer().fit_transform(X_kernel)
+        # Generate (approximate) kernelized matrix for fit input
+        if self.kernel_approx is not None:
+            t0 = _tic()
+            self.kernel_map_ = HFF_kernel_approx(kernel=self.skl_kernel,
+                                    num_meas_array=self.n_meas_array,
+                                    varMs=kernel_scales, n_components=self.n_components,
+                                    method=self.kernel_approx, normalize_rows=self.kernel_normalize,
+                                    dtype=self.kernel_dtype, random_state=self.random_state).fit(X)
+            X_kernel = self.kernel_map_.transform(X)
+            _toc('kernel', t0, X_kernel)
+            X_kernel_raw = X_kernel
+        else:
+            self.kernel_map_ = None
+            X_kernel = HFF_k_matrix(fml=X, kernel=self.skl_kernel,
+                                    num_meas_array=self.n_meas_array,
+                                    varMs=kernel_scales, dtype=self.kernel_dtype,
+                                    dist_cache=_get_dist_cache(self.cache_dist))
+            X_kernel_raw = X_kernel
+            #normalize (keep unnormalized kernel if needed for validation split)
+            if self.kernel_normalize:
+                t0 = _tic()
+                X_kernel = normalize(X_kernel, copy=(lambdau.size > 1))
+                _toc('normalize', t0, X_kernel, nbytes=(None if lambdau.size > 1 else 0))
+
+        #select lambda on validation split, slicing kernel computed above
+        self.path_scores_ = None
+        if lambdau.size > 1:
+            idx_train, idx_val = train_test_split(np.arange(X.shape[0]), test_size=self.lambda_val_size,
+                                                  random_state=self.random_state)
+            t0 = _tic()
+            k_train, k_val = _split_kernel(X_kernel_raw, idx_train, idx_val, self.n_kernels,
+                                           normalize_rows=self.kernel_normalize,
+                                           exact=(self.kernel_map_ is None))
+            _toc('normalize', t0, k_train, k_val)
+            t0 = _tic()
+            #glmnet only fits float64
+            val_model = glmnet(x = k_train.astype(np.float64, copy=False), y = y[idx_train].copy(),
+                               alpha = self.glm_alpha, lambdau = lambdau, **self.glmnet_args)
+            self.path_scores_ = _path_scores(y[idx_val], glmnetPredict(val_model, k_val))
+            _toc('path', t0, self.path_scores_)
+            del k_train, k_val
+        del X_kernel_raw
 
         # Fit
-        self.glmnet_model = glmnet(x = X_kernel, y = y.copy(), alpha = self.glm_alpha,
-                                     lambdau = self.lambdau, **self.glmnet_args)
+        t0 = _tic()
+        self.glmnet_model = glmnet(x = X_kernel.astype(np.float64, copy=False), y = y.copy(),
+                                     alpha = self.glm_alpha, lambdau = lambdau, **self.glmnet_args)
+        _toc('solve', t0)
+        #glmnet may end path early, only keep lambdas fit on all data
+        self.lambdau_ = np.asarray(self.glmnet_model['lambdau'])
+        self.lambda_idx_ = 0
+        if self.path_scores_ is not None:
+            self.lambda_idx_ = int(np.argmin(self.path_scores_[:self.lambdau_.size]))
+        self.lambda_best_ = self.lambdau_[self.lambda_idx_]
+
+        #prune unnormalized exact kernel to support of model
+        self.sparse_predictor_ = None
+        if (self.kernel_map_ is None) and not self.kernel_normalize:
+            t0 = _tic()
+            coef, intercept = _glmnet_coef(self.glmnet_model, self.lambda_idx_)
+            self.sparse_predictor_ = HFF_sparse_predictor(X, coef, intercept,
+                                        kernel=self.skl_kernel, num_meas_array=self.n_meas_array,
+                                        varMs=kernel_scales, dtype=self.kernel_dtype)
+            _toc('prune', t0, *(a for t in self.sparse_predictor_.types_ for a in t[2:]))
+
+        #shard dictionary of exact kernel for parallel predict
+        self.sharded_predictor_ = None
+        if (self.n_jobs is not None) and (self.kernel_map_ is None) and (self.sparse_predictor_ is None):
+            t0 = _tic()
+            coef, intercept = _glmnet_coef(self.glmnet_model, self.lambda_idx_)
+            self.sharded_predictor_ = HFF_sharded_predictor(X, coef, intercept,
+                                        kernel=self.skl_kernel, num_meas_array=self.n_meas_array,
+                                        varMs=kernel_scales, dtype=self.kernel_dtype,
+                                        normalize_rows=self.kernel_normalize, n_jobs=self.n_jobs,
+                                        max_bytes=self.kernel_max_bytes)
+            _toc('shard', t0, *(a for t in self.sharded_predictor_.types_ for a in t[2:]))
 
         # Store X,y seen during fit
         self.X_ = X
@@ -386,13 +1677,17 @@ class glmnet_kt_regressor(BaseEstimator):
         # Return the regressor
         return self
 
+    @_timed(store=False)
     def predict(self, X):
         """
         Applies pair-wise kernel between observed with fitted data.  The
-        predicts based on fitted model.  As part of predict process,
-        feature data is kernelized (based on instance kernel parameter)
-        and normalized -- should parameterize normalization or
-        functionalize both together outside `predict`.
+        predicts based on fitted model at selected lambda, `lambda_best_`.
+        As part of predict process, feature data is kernelized (based on
+        instance kernel parameter) and normalized (if `kernel_normalize`)
+        in blocks of rows bounded by `kernel_max_bytes`.  Unnormalized
+        sparse models only kernelize dictionary rows with nonzero
+        coefficients.  If `n_jobs` is set, shards of dictionary rows are
+        computed in parallel threads.
 
         __Parameters__
 
@@ -409,22 +1704,611 @@ class glmnet_kt_regressor(BaseEstimator):
         # Check is fit had been called
         check_is_fitted(self)
 
+        #pruned kernel, only supported dictionary rows
+        if self.sparse_predictor_ is not None:
+            return self.sparse_predictor_.predict(check_array(X))
+        #shards of dictionary in parallel threads
+        if self.sharded_predictor_ is not None:
+            return self.sharded_predictor_.predict(check_array(X))
+
+        #predict along path, return selected lambda
+        return self.predict_path(X)[..., self.lambda_idx_]
+
+    @_timed(store=False)
+    def predict_path(self, X):
+        """
+        Predicts for all lambdas of fitted path, `lambdau_`, from a single
+        kernelized matrix of `X`.
+
+        __Parameters__
+
+        > __X__ : ndarray of shape (n_samples, n_features)
+        >- Sample data used for predictions
+
+        __Returns__
+
+        > Estimated target(s) of shape (n_samples, n_lambdas) or
+        > (n_samples, n_targets, n_lambdas)
+
+        """
+
+        # Check is fit had been called
+        check_is_fitted(self)
+
         # Input validation
+        t0, X_in = _tic(), X
         X = check_array(X)
+        _toc('validate', t0, X, nbytes=_copied_bytes((X, X_in)))
 
         #put kernel scales together (reset in case called multiple times)
         kernel_scales = np.array([self.kernel_s0])
         for i in range(1,self.n_kernels):
             kernel_scales = np.append(kernel_scales,self.get_params()["kernel_s"+str(i)])
 
-        #kernelize input
-        X_kernel = HFF_k_matrix(fml=self.X_, fm=X,
+        #approximate kernel, feature maps are linear in number of samples
+        if self.kernel_map_ is not None:
+            t0 = _tic()
+            X_kernel = self.kernel_map_.transform(X)
+            _toc('kernel', t0, X_kernel)
+            t0 = _tic()
+            y_pred = glmnetPredict(self.glmnet_model, X_kernel)
+            _toc('solve', t0, y_pred)
+            return y_pred
+
+        #kernelize input in blocks of rows, normalize and predict each block
+        tiles = HFF_k_matrix_tiles(fml=self.X_, fm=X,
                         kernel=self.skl_kernel,
                         num_meas_array=self.n_meas_array,
-                        varMs=kernel_scales)
-        #normalize
-        X_kernel = Normalizer().fit_transform(X_kernel)
+                        varMs=kernel_scales, max_bytes=self.kernel_max_bytes,
+                        dtype=self.kernel_dtype, normalize_rows=self.kernel_normalize,
+                        dist_cache=_get_dist_cache(self.cache_dist))
 
         #predict and return
-        #glmnet returns with extra dimension, squeeze to remove
-        return np.squeeze(glmnetPredict(self.glmnet_model, X_kernel))
\ No newline at end of file
+        return _tiled_predict(lambda k_block: glmnetPredict(self.glmnet_model, k_block),
+                              tiles, X.shape[0])
+
+    def score_path(self, X, y):
+        """
+        Scores fitted path on `X`, `y` with `mse_EucDistance` (mean
+        squared error for single target).
+
+        __Returns__
+
+        > __scores__ : ndarray of shape (n_lambdas,)
+
+        """
+        return _path_scores(check_array(y, ensure_2d=False), self.predict_path(X))
+
+# Cell
+def _evaluate_layout(estimator, X_train, y_train, X_test, y_test, percentiles):
+    """Fits `estimator` on measurements of one layout, returns
+    `mse_EucDistance` and percentiles of Euclidean errors on test runs"""
+    y_pred = estimator.fit(X_train, y_train).predict(X_test)
+    errors = np.sqrt(np.sum((y_test-y_pred)**2, axis=1))
+    return mse_EucDistance(y_test, y_pred), np.percentile(errors, percentiles)
+
+def evaluate_layouts(estimator, X_layouts, y, test_size=0.2, percentiles=(50, 90), n_workers=None,
+                     random_state=None):
+    """
+    Scores candidate sensor layouts, e.g., `X_layouts` of
+    `RFchannel.generate_layouts`, by fitting a clone of `estimator` (a
+    kernel trick regressor) on measurements of each layout and
+    predicting held out runs.  Runs are split once, so all layouts are
+    trained and tested on the same Tx locations.  Layouts are evaluated
+    in parallel processes.
+
+    __Parameters__
+
+    >__estimator__ : estimator
+    >- e.g., `sklearn_kt_regressor`, cloned (unfitted) for each layout
+    >
+    >__X_layouts__ : ndarray of shape (n_layouts, n_runs, n_features)
+    >- measurements of each layout
+    >
+    >__y__ : ndarray of shape (n_runs, n_dims)
+    >- Tx locations of runs, shared by all layouts
+    >
+    >__test_size__ : float, default = 0.2
+    >- fraction of runs held out for scoring, see `train_test_split`
+    >
+    >__percentiles__ : sequence of float, default = (50, 90)
+    >- percentiles of Euclidean errors to return
+    >
+    >__n_workers__ : int, default = None
+    >- number of worker processes, defaults to number of CPUs.  If 1,
+    >    layouts are evaluated in this process.
+    >
+    >__random_state__ : int, default = None
+    >- seed of train/test split
+
+    __Returns__
+
+    >__mse__ : ndarray of shape (n_layouts,)
+    >- mean Euclidean distance error (`mse_EucDistance`) of each layout
+    >
+    >__errors_pct__ : ndarray of shape (n_layouts, n_percentiles)
+    >- percentiles of Euclidean distance errors of each layout
+    """
+    if np.ndim(X_layouts) != 3:
+        raise ValueError('X_layouts of shape {} not (n_layouts, n_runs, n_features)'.format(np.shape(X_layouts)))
+    idx_train, idx_test = train_test_split(np.arange(len(y)), test_size=test_size, random_state=random_state)
+    y_train, y_test = y[idx_train], y[idx_test]
+    if n_workers is None:
+        n_workers = os.cpu_count() or 1
+
+    #one task per layout, same split of runs
+    tasks = ((clone(estimator), X[idx_train], y_train, X[idx_test], y_test, percentiles) for X in X_layouts)
+    if n_workers == 1:
+        results = [_evaluate_layout(*task) for task in tasks]
+    else:
+        with ProcessPoolExecutor(max_workers=n_workers) as executor:
+            results = list(executor.map(_evaluate_layout, *zip(*tasks)))
+    mse = np.array([result[0] for result in results])
+    errors_pct = np.array([result[1] for result in results]).reshape(len(results), -1)
+    return mse, errors_pct
+
+def evaluate_subsets(estimator, subset_dists, y, sensor_subsets, test_size=0.2, percentiles=(50, 90),
+                     random_state=None):
+    """
+    Scores subsets of sensors (e.g., all k-of-n subsets for graceful
+    degradation analysis) by fitting a clone of `estimator` (a kernel
+    trick regressor with 'laplacian' or 'rbf' kernel) on the kept
+    measurements of each subset and predicting held out runs.
+    Distances of each subset are assembled from `subset_dists`, so only
+    kernel scales are applied per subset.  Runs are split once, so all
+    subsets are trained and tested on same runs.
+
+    __Parameters__
+
+    >__estimator__ : estimator
+    >- e.g., `sklearn_kt_regressor`, cloned (unfitted) for each subset
+    >    with `n_meas_array` and `cache_dist` of subset
+    >
+    >__subset_dists__ : HFF_subset_dists
+    >- distance contributions of measurements of all sensors
+    >
+    >__y__ : ndarray of shape (n_samples, n_dims)
+    >- Tx locations of runs
+    >
+    >__sensor_subsets__ : sequence of sequences of int
+    >- kept sensors of each subset, e.g., `itertools.combinations(range(n_rx), k)`
+    >
+    >__test_size__, __percentiles__, __random_state__
+    >- see `evaluate_layouts`
+
+    __Returns__
+
+    >__mse__ : ndarray of shape (n_subsets,)
+    >- mean Euclidean distance error (`mse_EucDistance`) of each subset
+    >
+    >__errors_pct__ : ndarray of shape (n_subsets, n_percentiles)
+    >- percentiles of Euclidean distance errors of each subset
+    """
+    idx_train, idx_test = train_test_split(np.arange(len(y)), test_size=test_size, random_state=random_state)
+    y_train, y_test = y[idx_train], y[idx_test]
+
+    #distances of each subset are shared by its fit and predict
+    results = []
+    for sensors in sensor_subsets:
+        X_sub, n_meas, dists = subset_dists.subset(sensors)
+        model = clone(estimator).set_params(n_meas_array=n_meas, cache_dist=dists)
+        results.append(_evaluate_layout(model, X_sub[idx_train], y_train, X_sub[idx_test], y_test, percentiles))
+    mse = np.array([result[0] for result in results])
+    errors_pct = np.array([result[1] for result in results]).reshape(len(results), -1)
+    return mse, errors_pct
+
+# Cell
+#data of latest search in this process, keyed by directory it was published to
+_search_data = {}
+
+def _load_search_data(path, n_folds, dist_keys, blas_threads):
+    """Returns `X`, `y`, folds and distances (`HFF_fold_dists`) of search
+    published to directory `path`, memory mapped once per process, and
+    controller of BLAS threads if limited to `blas_threads`"""
+    if path not in _search_data:
+        load = lambda name: np.load(os.path.join(path, name + '.npy'), mmap_mode='r')
+        X, y = load('X'), load('y')
+        folds = [(load('train{}'.format(k)), load('val{}'.format(k))) for k in range(n_folds)]
+        fold_dists = None
+        if dist_keys:
+            fold_dists = HFF_fold_dists(X)
+            fold_dists.full_dists_ = {key: load('dist_{}_{}_{}'.format(*key)) for key in dist_keys}
+        _search_data.clear()
+        controller = None if blas_threads is None else ThreadpoolController()
+        _search_data[path] = (X, y, folds, fold_dists, controller)
+    return _search_data[path]
+
+def _search_task(data, estimator, path_values, i_fold, subsample=1):
+    """Returns validation losses of `_fold_losses` on fold `i_fold` of
+    search `data`, only first `subsample` fraction of training rows
+    are fit"""
+    X, y, folds, fold_dists, controller = _load_search_data(*data)
+    idx_train, idx_val = folds[i_fold]
+    idx_train = idx_train[:int(np.ceil(subsample*len(idx_train)))]
+    fold = (X[idx_train], y[idx_train], X[idx_val], y[idx_val])
+    if controller is None:
+        return _fold_losses(estimator, path_values, *fold, fold_dists)
+    #limit BLAS threads during task only, so workers do not oversubscribe cores
+    with controller.limit(limits=data[-1]):
+        return _fold_losses(estimator, path_values, *fold, fold_dists)
+
+def _fold_losses(estimator, path_values, X_train, y_train, X_val, y_val, fold_dists=None):
+    """Kernelizes training and validation rows once for `estimator` and
+    returns validation `mse_EucDistance` (mean squared error for single
+    target) of each regularization in `path_values` (decreasing alpha
+    of `skl_model` or `lambdau`, None keeps estimator's).  As in `fit`,
+    an array `lambdau` of estimator is reduced to the lambda scoring best
+    on a `lambda_val_size` split of the training rows."""
+    #put kernel scales together
+    kernel_scales = np.array([estimator.kernel_s0])
+    for i in range(1,estimator.n_kernels):
+        kernel_scales = np.append(kernel_scales,estimator.get_params()["kernel_s"+str(i)])
+
+    if estimator.kernel_approx is not None:
+        kernel_map = HFF_kernel_approx(kernel=estimator.skl_kernel,
+                            num_meas_array=estimator.n_meas_array,
+                            varMs=kernel_scales, n_components=estimator.n_components,
+                            method=estimator.kernel_approx, normalize_rows=estimator.kernel_normalize,
+                            dtype=estimator.kernel_dtype, random_state=estimator.random_state).fit(X_train)
+        k_train, k_val = kernel_map.transform(X_train), kernel_map.transform(X_val)
+    else:
+        k_train = HFF_k_matrix(fml=X_train, kernel=estimator.skl_kernel,
+                               num_meas_array=estimator.n_meas_array, varMs=kernel_scales,
+                               dtype=estimator.kernel_dtype, dist_cache=fold_dists)
+        k_val = HFF_k_matrix(fml=X_train, fm=X_val, kernel=estimator.skl_kernel,
+                             num_meas_array=estimator.n_meas_array, varMs=kernel_scales,
+                             dtype=estimator.kernel_dtype, dist_cache=fold_dists)
+
+    #estimator's own lambdau, path selected on split of training rows (unnormalized kernel) as in fit
+    own = []
+    if isinstance(estimator, glmnet_kt_regressor) and (None in path_values):
+        own = -np.sort(-np.atleast_1d(np.asarray(estimator.lambdau, dtype=np.float64)))
+        if own.size > 1:
+            idx_in, idx_out = train_test_split(np.arange(X_train.shape[0]), test_size=estimator.lambda_val_size,
+                                               random_state=estimator.random_state)
+            k_in, k_out = _split_kernel(k_train, idx_in, idx_out, estimator.n_kernels,
+                                        normalize_rows=estimator.kernel_normalize,
+                                        exact=(estimator.kernel_approx is None))
+            #glmnet only fits float64
+            val_model = glmnet(x = k_in.astype(np.float64, copy=False), y = y_train[idx_in].copy(),
+                               alpha = estimator.glm_alpha, lambdau = own, **estimator.glmnet_args)
+            own = own[[int(np.argmin(_path_scores(y_train[idx_out], glmnetPredict(val_model, k_out))))]]
+            del k_in, k_out
+    if (estimator.kernel_approx is None) and estimator.kernel_normalize:
+        normalize(k_train, copy=False)
+        normalize(k_val, copy=False)
+
+    #all regularizations from same kernelized matrices
+    if isinstance(estimator, glmnet_kt_regressor):
+        #estimator's own lambda joins path of searched lambdas
+        lambdau = -np.sort(-np.unique(np.concatenate(([l for l in path_values if l is not None], own))))
+        model = glmnet(x = k_train.astype(np.float64, copy=False), y = y_train.copy(),
+                       alpha = estimator.glm_alpha, lambdau = lambdau, **estimator.glmnet_args)
+        #glmnet may end path early, remaining lambdas are not scored
+        path_losses = np.full(lambdau.size, np.inf)
+        y_path = glmnetPredict(model, k_val)
+        path_losses[:y_path.shape[-1]] = _path_scores(y_val, y_path)
+        index = {l: i for i, l in enumerate(lambdau)}
+        return np.array([path_losses[index[own[0] if l is None else l]] for l in path_values])
+    model = estimator.skl_model
+    path_model = isinstance(model, Ridge) or (isinstance(model, ElasticNet) and not isinstance(model, MultiTaskElasticNet))
+    if path_model and (len(path_values) > 1) and (None not in path_values):
+        y_path = _linear_path(model, k_train, y_train, k_val, np.array(path_values, dtype=np.float64))
+    else:
+        y_path = np.stack([(clone(model) if alpha is None else clone(model).set_params(alpha=alpha))
+                           .fit(k_train, y_train).predict(k_val) for alpha in path_values], axis=-1)
+    return _path_scores(y_val, y_path)
+
+@contextmanager
+def _search_runner(X, y, folds, dist_keys, n_workers=1, temp_dir=None):
+    """Publishes `X`, `y`, `folds` and distance matrices of `dist_keys`
+    once as files that workers memory map and yields a function running
+    a list of `_search_task` arguments (after data) in `n_workers`
+    processes"""
+    #BLAS threads of each worker process, split between workers
+    blas_threads = None if n_workers == 1 else max((os.cpu_count() or 1)//n_workers, 1)
+    path = tempfile.mkdtemp(prefix='kt_search_', dir=temp_dir)
+    data = (path, len(folds), dist_keys, blas_threads)
+    executor = None
+    try:
+        t0 = _tic()
+        arrays = {'X': X, 'y': y}
+        for k, (idx_train, idx_val) in enumerate(folds):
+            arrays['train{}'.format(k)], arrays['val{}'.format(k)] = idx_train, idx_val
+        for key in dist_keys:
+            X_type = X[:, key[0]:key[1]]
+            arrays['dist_{}_{}_{}'.format(*key)] = _HFF_DIST_FUNCS[key[2]](X_type, X_type)
+        for name, a in arrays.items():
+            np.save(os.path.join(path, name + '.npy'), a)
+        _toc('publish', t0, nbytes=sum(a.nbytes for a in arrays.values()))
+        del arrays
+
+        if n_workers > 1:
+            executor = ProcessPoolExecutor(max_workers=n_workers)
+        def run(tasks):
+            t0 = _tic()
+            if executor is None:
+                results = [_search_task(data, *task) for task in tasks]
+            else:
+                results = list(executor.map(_search_task, *zip(*((data,) + task for task in tasks))))
+            _toc('search', t0)
+            return results
+        yield run
+    finally:
+        if executor is not None:
+            executor.shutdown()
+        _search_data.pop(path, None)
+        shutil.rmtree(path, ignore_errors=True)
+
+class kt_search_cv(BaseEstimator):
+    """
+    Cross-validated hyperparameter search tailored to the kernel trick
+    regressors, `sklearn_kt_regressor` and `glmnet_kt_regressor`.
+    SKLearn's search tools pickle the data and estimator to a worker for
+    every fold of every candidate and each fit recomputes its kernel.
+    Here the data, folds and (for 'laplacian' and 'rbf' kernels) the
+    distance matrices of each measurement type are published once as
+    memory mapped files that worker processes share.  Candidates that
+    differ only in regularization (alpha of `skl_model` or `lambdau`)
+    are grouped, so each task kernelizes one fold once for a group and
+    scores its regularizations along a path (see `fit_path`).  Tasks
+    are spread over `n_workers` processes with BLAS threads split
+    between them.
+
+    Candidates are scored by negative `mse_EucDistance` (mean squared
+    error for single target), so greater is better as in SKLearn.
+
+    __Parameters__
+
+    >__estimator__ : estimator
+    >- `sklearn_kt_regressor` or `glmnet_kt_regressor`, cloned for each
+    >    candidate
+    >
+    >__param_distributions__ : dict or list of dicts
+    >- parameters of `estimator` to search, lists or distributions
+    >    (see SKLearn's `ParameterSampler`)
+    >
+    >__n_iter__ : int, default = 10
+    >- number of sampled candidates.  If None, all combinations of
+    >    lists are searched (see `ParameterGrid`).
+    >
+    >__cv__ : int or cross-validation generator, default = 5
+    >- folds, see SKLearn's `check_cv`
+    >
+    >__n_workers__ : int, default = None
+    >- number of worker processes, defaults to number of CPUs.  If 1,
+    >    tasks run in this process.
+    >
+    >__refit__ : boolean, default = True
+    >- whether to fit `best_estimator_` on all data
+    >
+    >__random_state__ : int, default = None
+    >- seed of sampled candidates
+    >
+    >__max_bytes__ : integer, default = 2**30
+    >- maximum total size of published distance matrices
+    >    (n_samples^2 per measurement type and kernel).  If exceeded,
+    >    each task computes distances of its fold.
+    >
+    >__temp_dir__ : str, default = None
+    >- directory of published files, defaults to system temporary
+    >    directory
+    """
+
+    def __init__(self, estimator, param_distributions, n_iter=10, cv=5, n_workers=None,
+                 refit=True, random_state=None, max_bytes=2**30, temp_dir=None):
+        self.estimator = estimator
+        self.param_distributions = param_distributions
+        self.n_iter = n_iter
+        self.cv = cv
+        self.n_workers = n_workers
+        self.refit = refit
+        self.random_state = random_state
+        self.max_bytes = max_bytes
+        self.temp_dir = temp_dir
+
+    def _candidates(self):
+        """Returns list of candidate parameters"""
+        if self.n_iter is None:
+            return list(ParameterGrid(self.param_distributions))
+        return list(ParameterSampler(self.param_distributions, self.n_iter, random_state=self.random_state))
+
+    @_timed('fit', reset=True)
+    def fit(self, X, y):
+        """
+        Scores all candidates on each fold and (if `refit`) fits best
+        candidate on all data.
+
+        __Parameters__
+
+        > __X__ : ndarray of shape (n_samples, n_features)
+        >- Training data
+        >
+        > __y__ : ndarray of shape (n_samples, spatial dimensions)
+        >- Response data (location of Tx for each sample set
+        >  of measurements)
+
+        __Returns__
+
+        > Self, sets self.cv_results_ (dict of 'params',
+        > 'split<k>_test_score', 'mean_test_score', 'std_test_score' and
+        > 'rank_test_score' as in SKLearn), self.best_index_,
+        > self.best_params_, self.best_score_, self.best_estimator_ (if
+        > `refit`), self.n_tasks_ and self.timings_ (if profiled)
+
+        """
+        t0, X_in, y_in = _tic(), X, y
+        X, y = check_X_y(X, y, multi_output=True)
+        _toc('validate', t0, X, y, nbytes=_copied_bytes((X, X_in), (y, y_in)))
+        if not isinstance(self.estimator, (sklearn_kt_regressor, glmnet_kt_regressor)):
+            raise ValueError('estimator {} is not a kernel trick regressor'.format(type(self.estimator).__name__))
+        if getattr(self.estimator, 'skl_alphas', None) is not None:
+            raise ValueError('skl_alphas of estimator is not supported, search alpha of skl_model instead')
+        candidates = self._candidates()
+        for i, params in enumerate(candidates):
+            if np.size(params.get(self._path_key(), 0)) != 1:
+                raise ValueError('{} of candidate {} is not a scalar'.format(self._path_key(), i))
+        folds = self._folds(X, y)
+        groups = self._groups(candidates, range(len(candidates)))
+
+        #distances of each measurement type and kernel, if shared by all tasks within budget
+        dist_keys = set()
+        for estimator, _, _ in groups:
+            if (estimator.kernel_approx is None) and (estimator.skl_kernel in _HFF_DIST_FUNCS):
+                num_meas_array = estimator.n_meas_array if np.size(estimator.n_meas_array) else [X.shape[1]]
+                idx = np.concatenate(([0], np.cumsum(num_meas_array))).astype(int)
+                dist_keys.update((idx[m], idx[m+1], estimator.skl_kernel) for m in range(len(idx) - 1))
+        if len(dist_keys)*X.shape[0]**2*np.dtype(np.float64).itemsize > self.max_bytes:
+            dist_keys = set()
+
+        self.n_tasks_ = 0
+        n_workers = min(self.n_workers or os.cpu_count() or 1, len(groups)*len(folds))
+        with _search_runner(X, y, folds, sorted(dist_keys), n_workers, self.temp_dir) as run:
+            scores, results = self._search(run, candidates, folds)
+
+        #rank by score, candidates of later rungs (successive halving) first
+        mean = scores.mean(axis=1)
+        order = np.lexsort((-mean, -results.get('rung', np.zeros(len(candidates)))))
+        self.cv_results_ = {'params': candidates, **results}
+        for k in range(len(folds)):
+            self.cv_results_['split{}_test_score'.format(k)] = scores[:, k]
+        self.cv_results_['mean_test_score'] = mean
+        self.cv_results_['std_test_score'] = scores.std(axis=1)
+        self.cv_results_['rank_test_score'] = np.empty(len(candidates), dtype=int)
+        self.cv_results_['rank_test_score'][order] = np.arange(1, len(candidates) + 1)
+        self.best_index_ = int(order[0])
+        self.best_params_ = candidates[self.best_index_]
+        self.best_score_ = mean[self.best_index_]
+
+        if self.refit:
+            t0 = _tic()
+            self.best_estimator_ = clone(self.estimator).set_params(**self.best_params_).fit(X, y)
+            _toc('refit', t0)
+        return self
+
+    def _path_key(self):
+        """Returns regularization parameter scored along a path"""
+        return 'lambdau' if isinstance(self.estimator, glmnet_kt_regressor) else 'skl_model__alpha'
+
+    def _folds(self, X, y):
+        """Returns list of training and validation rows of each fold"""
+        return list(check_cv(self.cv, y).split(X, y))
+
+    def _groups(self, candidates, members):
+        """Groups `members` (indices of `candidates`) differing only in
+        regularization, i.e., sharing kernel.  Returns list of estimator,
+        decreasing regularizations and members of each group."""
+        path_key = self._path_key()
+        groups = OrderedDict()
+        for i in members:
+            kernel_params = {key: val for key, val in candidates[i].items() if key != path_key}
+            groups.setdefault(repr(sorted(kernel_params.items())), (kernel_params, []))[1].append(i)
+        result = []
+        for kernel_params, group in groups.values():
+            estimator = clone(self.estimator).set_params(**{**kernel_params, 'cache_dist': False, 'n_jobs': None})
+            path_values = sorted({candidates[i].get(path_key) for i in group},
+                                 key=lambda val: -np.inf if val is None else -val)
+            result.append((estimator, path_values, group))
+        return result
+
+    def _score(self, run, candidates, members, n_folds, subsample=1):
+        """Scores `members` (indices of `candidates`) on each fold with
+        `subsample` fraction of training rows, returns scores of shape
+        (n_candidates, n_folds), NaN for others"""
+        groups = self._groups(candidates, members)
+        keys = [(g, k) for g in range(len(groups)) for k in range(n_folds)]
+        tasks = [(groups[g][0], groups[g][1], k, subsample) for g, k in keys]
+        self.n_tasks_ += len(tasks)
+        path_key = self._path_key()
+        scores = np.full((len(candidates), n_folds), np.nan)
+        for (g, k), losses in zip(keys, run(tasks)):
+            _, path_values, group = groups[g]
+            for i in group:
+                scores[i, k] = -losses[path_values.index(candidates[i].get(path_key))]
+        return scores
+
+    def _search(self, run, candidates, folds):
+        """Returns scores of shape (n_candidates, n_folds) and additional
+        columns of `cv_results_`"""
+        return self._score(run, candidates, range(len(candidates)), len(folds)), {}
+
+    def predict(self, X):
+        """Returns estimates of `best_estimator_`"""
+        check_is_fitted(self, 'best_estimator_')
+        return self.best_estimator_.predict(X)
+
+# Cell
+class kt_halving_search_cv(kt_search_cv):
+    """
+    Successive halving variant of `kt_search_cv`.  Most candidates of a
+    search over kernel type, kernel scales (`kernel_s0`-`kernel_s2`)
+    and regularization are bad and do not need a fit on all training
+    data to tell.  All candidates are first scored (on each fold) with
+    a dictionary of a small random subset of training rows, only best
+    1/`factor` of candidates are promoted to next rung with `factor`
+    times as many rows, and so on until the survivors of last rung are
+    scored with all training rows.  Validation rows of each fold are
+    always complete.  Since kernelized matrix of `n` dictionary rows is
+    `n` x `n_types*n` and solves are superlinear in `n`, early rungs
+    cost a small fraction of a full fit.
+
+    Candidates are ranked by rung and then by score of that rung, so
+    `best_params_` is the best candidate of last rung.
+
+    __Parameters__
+
+    >__estimator__, __param_distributions__, __n_iter__, __cv__
+    >- see `kt_search_cv`
+    >
+    >__factor__ : int, default = 3
+    >- fraction of candidates kept, 1/`factor`, and growth of training
+    >    rows between rungs
+    >
+    >__min_rows__ : int, default = 30
+    >- minimum training rows of each fold at first rung, limits number
+    >    of rungs.  If None, rungs are only limited by number of
+    >    candidates.
+    >
+    >__n_workers__, __refit__, __random_state__, __max_bytes__, __temp_dir__
+    >- see `kt_search_cv`, `random_state` also sets random subsets
+    >    of training rows
+    """
+
+    def __init__(self, estimator, param_distributions, n_iter=10, cv=5, factor=3, min_rows=30,
+                 n_workers=None, refit=True, random_state=None, max_bytes=2**30, temp_dir=None):
+        super().__init__(estimator, param_distributions, n_iter=n_iter, cv=cv, n_workers=n_workers,
+                         refit=refit, random_state=random_state, max_bytes=max_bytes, temp_dir=temp_dir)
+        self.factor = factor
+        self.min_rows = min_rows
+
+    def _folds(self, X, y):
+        """Returns list of (randomly ordered) training and validation rows
+        of each fold, so rungs fit nested subsets of training rows"""
+        rng = np.random.RandomState(self.random_state)
+        return [(rng.permutation(idx_train), idx_val) for idx_train, idx_val in super()._folds(X, y)]
+
+    def _search(self, run, candidates, folds):
+        """Scores candidates along rungs of successive halving, sets
+        self.rungs_ (number of candidates and fraction of training rows
+        of each rung) and adds 'rung' of each candidate to results"""
+        if self.factor < 2:
+            raise ValueError('factor {} is not at least 2'.format(self.factor))
+        #rungs, such that last rung keeps at most factor candidates
+        n_rungs = max(int(np.ceil(np.log(len(candidates))/np.log(self.factor) - 1e-9)), 1)
+        if self.min_rows is not None:
+            n_train = min(len(idx_train) for idx_train, _ in folds)
+            n_rungs = max(min(n_rungs, 1 + int(np.floor(np.log(n_train/self.min_rows)/np.log(self.factor)))), 1)
+
+        members = list(range(len(candidates)))
+        scores = np.full((len(candidates), len(folds)), np.nan)
+        rungs = np.zeros(len(candidates), dtype=int)
+        self.rungs_ = []
+        for r in range(n_rungs):
+            subsample = float(self.factor)**(r + 1 - n_rungs)
+            scores[members] = self._score(run, candidates, members, len(folds), subsample)[members]
+            rungs[members] = r
+            self.rungs_.append({'n_candidates': len(members), 'subsample': subsample})
+            #promote best of rung
+            order = np.argsort(-scores[members].mean(axis=1), kind='mergesort')
+            members = [members[i] for i in order[:int(np.ceil(len(members)/self.factor))]]
+        return scores, {'rung': rungs}
\ No newline at end of file
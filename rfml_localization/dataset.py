@@ -0,0 +1,306 @@
+# AUTOGENERATED! DO NOT EDIT! File to edit: 02_dataset.ipynb (unless otherwise specified).
+
+__all__ = ['RFdataset_writer', 'load_RFdataset', 'RFdictionary_cache']
+
+# Cell
+import os
+import json
+import shutil
+import hashlib
+import inspect
+import tempfile
+import numpy as np
+from .RFsimulation import RFchannel, _RFCHANNEL_PARAMS, _RFCHANNEL_FLAGS
+
+# Cell
+#format version of on-disk datasets, file names of sidecar and arrays
+_DATASET_VERSION = 1
+_DATASET_META = 'dataset.json'
+_DATASET_ARRAYS = {'X_model': 'X_model.bin', 'rxtx_locs': 'rxtx_locs.bin'}
+
+def _to_json(val):
+    """Converts numpy values (and seed sequences) of channel attributes to
+    JSON serializable values"""
+    if isinstance(val, np.random.SeedSequence):
+        return {'entropy': val.entropy, 'spawn_key': list(val.spawn_key)}
+    if isinstance(val, np.ndarray):
+        return val.tolist()
+    if isinstance(val, np.generic):
+        return val.item()
+    if isinstance(val, (list, tuple)):
+        return [_to_json(v) for v in val]
+    return val
+
+class RFdataset_writer:
+    """
+    Streams simulated observations of `RFchannel` instances (chunks of
+    runs, e.g., from `generate_Xmodel` or `generate_parallel`) into an
+    on-disk dataset directory.  Arrays are appended as raw (C order)
+    binary blocks, `X_model.bin` of shape [n_runs] x [measurements] and
+    `rxtx_locs.bin` of shape [n_runs] x [location dims] x [num_rx + 1],
+    and a JSON sidecar, `dataset.json`, records dtypes, shapes, channel
+    parameters, flags, seeds and `n_meas_array`.  See `load_RFdataset`.
+
+    The sidecar is written on `close` (or exit of `with` block), so a
+    dataset is only loadable once complete.
+
+    __Parameters__
+
+    >__path__ : str
+    >- directory of dataset, created if needed
+    >
+    >__dtype__ : numpy dtype, default = np.float64
+    >- data type of stored measurements, np.float32 halves size on disk
+    >
+    >__overwrite__ : boolean, default = False
+    >- whether to replace an existing dataset in `path`
+    """
+
+    def __init__(self, path, dtype=np.float64, overwrite=False):
+        self.path = path
+        self.dtype = np.dtype(dtype)
+        os.makedirs(path, exist_ok=True)
+        if os.path.exists(os.path.join(path, _DATASET_META)) and not overwrite:
+            raise ValueError('dataset already exists in {}, set overwrite'.format(repr(path)))
+        #start empty arrays, sidecar only written when complete
+        for name in list(_DATASET_ARRAYS.values()) + [_DATASET_META]:
+            if os.path.exists(os.path.join(path, name)):
+                os.remove(os.path.join(path, name))
+        self.files_ = {key: open(os.path.join(path, name), 'ab') for key, name in _DATASET_ARRAYS.items()}
+        self.meta_ = None
+        self.loc_shape_ = None
+        self.n_runs_ = 0
+        self.seeds_ = []
+
+    def append(self, channel):
+        """
+        Appends `X_model` and `rxtx_locs` of all runs of `channel`, an
+        `RFchannel` instance after `generate_Xmodel`.  All chunks must
+        have same channel parameters, flags and measurements.
+
+        __Returns__
+
+        > Self
+        """
+        meta = {'params': {key: _to_json(getattr(channel, key)) for key in _RFCHANNEL_PARAMS},
+                'flags': {key: _to_json(getattr(channel, key, None)) for key in _RFCHANNEL_FLAGS},
+                'n_meas_array': _to_json(channel.n_meas_array)}
+        loc_shape = list(channel.rxtx_locs.shape[:2])
+        if self.meta_ is None:
+            self.meta_, self.loc_shape_ = meta, loc_shape
+        elif (meta != self.meta_) or (loc_shape != self.loc_shape_):
+            raise ValueError('channel parameters, flags or measurements differ from earlier chunks')
+        X_model = np.ascontiguousarray(channel.X_model, dtype=self.dtype)
+        rxtx_locs = np.ascontiguousarray(np.moveaxis(channel.rxtx_locs, 2, 0), dtype=self.dtype)
+        #append raw blocks, rows are runs
+        X_model.tofile(self.files_['X_model'])
+        rxtx_locs.tofile(self.files_['rxtx_locs'])
+        self.n_runs_ += X_model.shape[0]
+        self.seeds_.append({key: _to_json(getattr(channel, key, None))
+                            for key in ('seed_loc', 'seed_Xmodel', 'seed_parallel')})
+        return self
+
+    def close(self):
+        """Closes array files and writes JSON sidecar of dataset"""
+        for f in self.files_.values():
+            f.close()
+        if self.meta_ is None:
+            raise ValueError('no chunks appended to dataset')
+        n_features = int(np.sum(self.meta_['n_meas_array']))
+        meta = {'version': _DATASET_VERSION, 'n_runs': self.n_runs_, 'dtype': self.dtype.str,
+                'arrays': {'X_model': {'file': _DATASET_ARRAYS['X_model'], 'shape': [self.n_runs_, n_features]},
+                           'rxtx_locs': {'file': _DATASET_ARRAYS['rxtx_locs'], 'shape': [self.n_runs_] + self.loc_shape_}},
+                **self.meta_, 'seeds': self.seeds_}
+        with open(os.path.join(self.path, _DATASET_META), 'w') as f:
+            json.dump(meta, f, indent=1)
+        return self
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+        else:
+            for f in self.files_.values():
+                f.close()
+
+# Cell
+def load_RFdataset(path, mmap_mode='r'):
+    """
+    Loads dataset written by `RFdataset_writer` as an `RFchannel`
+    instance with channel parameters and flags of the dataset.  Arrays
+    are memory-mapped, not read, so loading takes constant time and
+    processes loading same dataset share one page-cache copy.
+    `X_model` can be passed directly to the kernel trick regressors.
+
+    __Parameters__
+
+    >__path__ : str
+    >- directory of dataset
+    >
+    >__mmap_mode__ : str, default = 'r'
+    >- mode of `np.memmap`, 'r' (read only) or 'c' (copy on write)
+
+    __Returns__
+
+    >RFchannel instance, sets self.X_model (memmap of [n_runs] x
+    >    [measurements]), self.rxtx_locs (view of [location dims] x
+    >    [num_rx + 1] x [n_runs]), self.n_meas_array, self.n_runs,
+    >    flags and self.dataset_meta (JSON sidecar)
+    """
+    with open(os.path.join(path, _DATASET_META)) as f:
+        meta = json.load(f)
+    if meta['version'] != _DATASET_VERSION:
+        raise ValueError('dataset version {} not supported'.format(meta['version']))
+
+    #memory map arrays, runs are rows
+    arrays = {key: np.memmap(os.path.join(path, info['file']), dtype=np.dtype(meta['dtype']),
+                             mode=mmap_mode, shape=tuple(info['shape']))
+              for key, info in meta['arrays'].items()}
+
+    channel = RFchannel(**meta['params'])
+    for key, val in meta['flags'].items():
+        setattr(channel, key, np.array(val) if isinstance(val, list) else val)
+    channel.n_meas_array = np.array(meta['n_meas_array'])
+    channel.n_runs = meta['n_runs']
+    channel.X_model = arrays['X_model']
+    channel.rxtx_locs = np.moveaxis(arrays['rxtx_locs'], 0, 2)
+    channel.dataset_meta = meta
+    return channel
+
+# Cell
+class RFdictionary_cache:
+    """
+    Content-addressed on-disk cache of simulated fingerprint
+    dictionaries (e.g., grid dictionaries, `grid_flag=1`), so repeated
+    experiments with same channel, layout and seed load the dictionary
+    instead of regenerating it.  Entries are datasets of
+    `RFdataset_writer` in `path`, named by a sha256 key of the channel
+    parameters and of all (default filled) arguments of
+    `generate_RxTxlocations` and `generate_Xmodel`, i.e., `areaWL`,
+    `sensor_locs`, flags and seeds.  Least recently used entries are
+    evicted once total size exceeds `max_bytes`.
+
+    Only deterministic draws are cached: without `seed` in
+    `xmodel_args` (and, if not grid, in `rxtx_args`) the dictionary is
+    generated every time.
+
+    __Parameters__
+
+    >__path__ : str, default = None
+    >- directory of cache, default `~/.cache/rfml_localization/dictionaries`
+    >
+    >__max_bytes__ : int, default = 2**32
+    >- size bound of all cached entries, in bytes
+    >
+    >__dtype__ : numpy dtype, default = np.float64
+    >- data type of stored measurements, see `RFdataset_writer`
+    """
+
+    def __init__(self, path=None, max_bytes=2**32, dtype=np.float64):
+        if path is None:
+            path = os.path.join(os.path.expanduser('~'), '.cache', 'rfml_localization', 'dictionaries')
+        self.path = path
+        self.max_bytes = max_bytes
+        self.dtype = np.dtype(dtype)
+        os.makedirs(path, exist_ok=True)
+
+    def key(self, channel, rxtx_args={}, xmodel_args={}):
+        """Returns sha256 hex key of dictionary of `channel` generated with
+        `rxtx_args` and `xmodel_args`, defaults filled in so omitted and
+        explicitly passed default arguments share an entry"""
+        args = {}
+        for name, func, kwargs in (('rxtx', RFchannel.generate_RxTxlocations, rxtx_args),
+                                   ('xmodel', RFchannel.generate_Xmodel, xmodel_args)):
+            bound = inspect.signature(func).bind(channel, **kwargs)
+            bound.apply_defaults()
+            args[name] = {key: _to_json(val) for key, val in bound.arguments.items() if key != 'self'}
+        content = {'version': _DATASET_VERSION, 'dtype': self.dtype.str,
+                   'params': {key: _to_json(getattr(channel, key)) for key in _RFCHANNEL_PARAMS}, **args}
+        return hashlib.sha256(json.dumps(content, sort_keys=True).encode()).hexdigest()
+
+    def get(self, channel, rxtx_args={}, xmodel_args={}):
+        """
+        Returns dictionary of `channel`, i.e., `generate_RxTxlocations`
+        with `rxtx_args` and then `generate_Xmodel` with `xmodel_args`,
+        loaded from cache (memory-mapped, see `load_RFdataset`) or
+        generated and stored on a miss.
+
+        __Returns__
+
+        >RFchannel instance, cached dictionary with `self.cache_key` or,
+        >    if not deterministic, `channel` with generated dictionary
+        """
+        grid = rxtx_args.get('grid_flag', 0) == 1
+        if xmodel_args.get('seed') is None or (not grid and rxtx_args.get('seed') is None):
+            channel.generate_RxTxlocations(**rxtx_args)
+            return channel.generate_Xmodel(**xmodel_args)
+
+        key = self.key(channel, rxtx_args, xmodel_args)
+        entry = os.path.join(self.path, key)
+        if not os.path.exists(os.path.join(entry, _DATASET_META)):
+            channel.generate_RxTxlocations(**rxtx_args)
+            channel.generate_Xmodel(**xmodel_args)
+            #write to temporary directory, then rename so readers never see partial entries
+            tmp_path = tempfile.mkdtemp(dir=self.path, prefix='.tmp-')
+            with RFdataset_writer(tmp_path, dtype=self.dtype, overwrite=True) as writer:
+                writer.append(channel)
+            self._publish(tmp_path, entry)
+            self.evict(keep=key)
+        else:
+            #mark as recently used
+            os.utime(entry)
+        cached = load_RFdataset(entry)
+        cached.cache_key = key
+        return cached
+
+    def _publish(self, tmp_path, entry):
+        """Renames complete entry written to `tmp_path` to `entry`.  An
+        entry written by another process meanwhile is kept, a stale
+        partial entry (without sidecar, e.g., of an interrupted copy) is
+        replaced and other errors are raised."""
+        try:
+            os.rename(tmp_path, entry)
+            return
+        except OSError:
+            if os.path.exists(os.path.join(entry, _DATASET_META)):
+                #entry written by another process meanwhile
+                shutil.rmtree(tmp_path, ignore_errors=True)
+                return
+            if not os.path.isdir(entry):
+                shutil.rmtree(tmp_path, ignore_errors=True)
+                raise
+        #stale partial entry, replace it
+        shutil.rmtree(entry, ignore_errors=True)
+        try:
+            os.rename(tmp_path, entry)
+        except OSError:
+            shutil.rmtree(tmp_path, ignore_errors=True)
+            if not os.path.exists(os.path.join(entry, _DATASET_META)):
+                raise
+
+    def entries(self):
+        """Returns list of (key, size in bytes, last use time) of cached
+        entries, least recently used first"""
+        entries = []
+        for key in os.listdir(self.path):
+            entry = os.path.join(self.path, key)
+            if key.startswith('.') or not os.path.isdir(entry):
+                continue
+            size = sum(os.path.getsize(os.path.join(entry, name)) for name in os.listdir(entry))
+            entries.append((key, size, os.path.getmtime(entry)))
+        return sorted(entries, key=lambda entry: entry[2])
+
+    def evict(self, keep=None):
+        """Removes least recently used entries (except `keep`) until total
+        size is at most `max_bytes`"""
+        entries = self.entries()
+        total = sum(entry[1] for entry in entries)
+        for key, size, _ in entries:
+            if total <= self.max_bytes:
+                break
+            if key != keep:
+                shutil.rmtree(os.path.join(self.path, key), ignore_errors=True)
+                total -= size
+        return self
\ No newline at end of file
@@ -0,0 +1,186 @@
+# AUTOGENERATED! DO NOT EDIT! File to edit: 03_profiling.ipynb (unless otherwise specified).
+
+__all__ = ['stage_profiler', 'keep_timings']
+
+# Cell
+import time
+import threading
+from functools import wraps
+from collections import OrderedDict
+
+# Cell
+#active collectors of stage records, per thread
+_collectors = threading.local()
+#whether decorated methods keep `timings_` outside of profilers, see `keep_timings`
+_keep_timings = False
+
+def _tic():
+    """Returns start time of a stage, None if no collector is active in
+    thread (instrumentation is then a single lookup per stage)"""
+    if getattr(_collectors, 'stack', None):
+        return time.perf_counter()
+    return None
+
+def _toc(stage, t0, *arrays, nbytes=None, source=None):
+    """Records `stage` started at `t0` (see `_tic`) to active collectors.
+    Record holds wall time, shapes of output `arrays` and bytes allocated
+    (`nbytes`, defaults to bytes of `arrays`).  Source is the innermost
+    collecting call (e.g., 'sklearn_kt_regressor.fit'), else `source`."""
+    if t0 is None:
+        return
+    seconds = time.perf_counter() - t0
+    stack = _collectors.stack
+    for collector in reversed(stack):
+        if collector.source is not None:
+            source = collector.source
+            break
+    arrays = [a for a in arrays if a is not None]
+    if nbytes is None:
+        nbytes = sum(a.nbytes for a in arrays)
+    record = {'source': source, 'stage': stage, 'seconds': seconds,
+              'nbytes': int(nbytes), 'shapes': [a.shape for a in arrays]}
+    for collector in stack:
+        collector.add(record)
+
+def _copied_bytes(*pairs):
+    """Bytes of (checked, passed) array `pairs` that input validation
+    converted or copied"""
+    return sum(a.nbytes for a, a0 in pairs if a is not a0)
+
+def _add_record(totals, record):
+    """Adds `record` to `totals` of its stage"""
+    total = totals.get(record['stage'])
+    if total is None:
+        totals[record['stage']] = {'seconds': record['seconds'], 'nbytes': record['nbytes'],
+                                   'calls': 1, 'shapes': record['shapes']}
+    else:
+        total['seconds'] += record['seconds']
+        total['nbytes'] += record['nbytes']
+        total['calls'] += 1
+
+class _stage_collector:
+    """Base of stage collectors, active within `with` block in thread"""
+    source = None
+
+    def __enter__(self):
+        if getattr(_collectors, 'stack', None) is None:
+            _collectors.stack = []
+        _collectors.stack.append(self)
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        _collectors.stack.remove(self)
+
+class _stage_timings(_stage_collector):
+    """Collects totals of each stage of call `source` (e.g., fit of an
+    estimator) into `timings`, see `timings_` of kernel trick regressors"""
+
+    def __init__(self, source):
+        self.source = source
+        self.timings = OrderedDict()
+
+    def add(self, record):
+        _add_record(self.timings, record)
+
+def _timed(key=None, reset=False, store=True):
+    """Decorator of methods that names the source of their stages and,
+    if `store` and a profiler is active (or `keep_timings` is on),
+    keeps stage totals of last call in `self.timings_[key]` (default
+    method name).  Earlier timings are dropped if `reset` (e.g., fit).
+    Read only methods (e.g., predict) should not `store`, so concurrent
+    calls do not modify shared state.  Otherwise the method is called
+    directly."""
+    def decorator(method):
+        name = key or method.__name__
+        @wraps(method)
+        def timed(self, *args, **kwargs):
+            profiled = bool(getattr(_collectors, 'stack', None))
+            if not (profiled or (store and _keep_timings)):
+                return method(self, *args, **kwargs)
+            with _stage_timings('{}.{}'.format(type(self).__name__, method.__name__)) as collector:
+                result = method(self, *args, **kwargs)
+            if not store:
+                return result
+            timings = OrderedDict() if reset else getattr(self, 'timings_', OrderedDict())
+            timings[name] = collector.timings
+            self.timings_ = timings
+            return result
+        return timed
+    return decorator
+
+# Cell
+class stage_profiler(_stage_collector):
+    """
+    Context manager that records stages of `HFF_k_matrix`,
+    `HFF_k_matrix_tiles`, the kernel trick regressors and `RFchannel`
+    simulation called within its `with` block (same thread).  Each
+    stage record is a dictionary of
+
+    - 'source' : calling function or method, e.g., 'sklearn_kt_regressor.fit'
+    - 'stage' : 'validate' (input checks), 'kernel' (kernelized matrix or
+        feature maps), 'normalize', 'path' (alpha/lambda path), 'solve'
+        (fit or predict of sklearn/glmnet model), 'prune' (see
+        `HFF_sparse_predictor`), 'shard' and 'reduce' (see
+        `HFF_sharded_predictor`), 'allocate', 'ideal', 'noise', 'write'
+        (simulation, see `RFchannel.generate_Xmodel`)
+    - 'seconds' : wall time
+    - 'nbytes' : bytes of arrays allocated by stage (in place stages
+        and reused buffers are 0)
+    - 'shapes' : shapes of output arrays of stage
+
+    Within profilers (or if `keep_timings` is on), estimators and
+    channels also keep totals of their last fit or simulation calls in
+    `timings_`, predict does not modify estimators.  Outside of
+    profilers, instrumentation is a single lookup per stage and call.
+
+    __Parameters__
+
+    >__callback__ : callable, default = None
+    >- called with each record as stage completes, e.g., to forward
+    >    stages to metrics
+    >
+    >__keep__ : boolean, default = True
+    >- whether to keep records in self.records
+    """
+
+    def __init__(self, callback=None, keep=True):
+        self.callback = callback
+        self.keep = keep
+        self.records = []
+
+    def add(self, record):
+        """Keeps `record` and passes it to callback"""
+        if self.keep:
+            self.records.append(record)
+        if self.callback is not None:
+            self.callback(record)
+
+    def summary(self):
+        """
+        Totals of kept records per source and stage.
+
+        __Returns__
+
+        > __totals__ : dictionary of source to dictionary of stage to
+        > 'seconds', 'nbytes', 'calls' and 'shapes' (first call)
+        """
+        totals = OrderedDict()
+        for record in self.records:
+            _add_record(totals.setdefault(record['source'], OrderedDict()), record)
+        return totals
+
+
+def keep_timings(keep=True):
+    """
+    Turns on (or off) keeping stage totals of last fit or simulation
+    calls in `timings_` of estimators and channels outside of
+    profilers, e.g., to inspect a single fit without a `stage_profiler`.
+    Applies to all threads.
+
+    __Returns__
+
+    > previous setting
+    """
+    global _keep_timings
+    previous, _keep_timings = _keep_timings, bool(keep)
+    return previous
\ No newline at end of file
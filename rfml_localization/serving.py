@@ -0,0 +1,375 @@
+# AUTOGENERATED! DO NOT EDIT! File to edit: 04_serving.ipynb (unless otherwise specified).
+
+__all__ = ['RFpredict_server']
+
+# Cell
+import os
+import json
+import time
+import pickle
+import logging
+import asyncio
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+from sklearn.utils.validation import check_is_fitted
+
+# Cell
+#errors of micro-batches are logged, server keeps serving
+_logger = logging.getLogger(__name__)
+#loop of running coroutine (get_running_loop is python 3.7+)
+_running_loop = getattr(asyncio, 'get_running_loop', asyncio.get_event_loop)
+
+class RFpredict_server:
+    """
+    Local asyncio server of a fitted estimator (e.g., `sklearn_kt_regressor`
+    or `glmnet_kt_regressor`).  Concurrent requests are queued and grouped
+    into micro-batches of at most `max_batch` rows.  Each batch runs one
+    vectorized `predict` in a worker thread, so new requests keep
+    queueing meanwhile and the next batch grows with load.
+
+    Over a Unix socket, requests and responses are lines of JSON.  Over
+    localhost TCP, the server speaks HTTP (`POST /predict`, `GET
+    /metrics`).  A request is `{"id": any, "X": rows}` where rows is a
+    single measurement vector or a list of them, the response is `{"id":
+    id, "y": estimates}` or `{"id": id, "error": message}`.  A line of
+    `{"metrics": true}` returns `metrics`.
+
+    __Parameters__
+
+    >__estimator__ : fitted estimator or str
+    >- estimator with `predict` and `X_` (data seen during fit), or path
+    >    of pickled estimator
+    >
+    >__max_batch__ : integer, default = 256
+    >- maximum rows of a micro-batch (requests are never split)
+    >
+    >__max_delay__ : float, default = 0
+    >- seconds oldest queued request may wait for more requests before
+    >    its batch is dispatched (unless full).  With 0, a batch is
+    >    dispatched as soon as worker is free, so a single client pays
+    >    no wait and batches hold requests queued during last predict
+    >
+    >__n_window__ : integer, default = 10000
+    >- number of latest requests and batches kept for percentiles of
+    >    `metrics`
+    """
+
+    def __init__(self, estimator, max_batch=256, max_delay=0, n_window=10000):
+        if isinstance(estimator, str):
+            with open(estimator, 'rb') as f:
+                estimator = pickle.load(f)
+        check_is_fitted(estimator)
+        self.estimator = estimator
+        self.max_batch = max_batch
+        self.max_delay = max_delay
+        self.n_window = n_window
+        self.n_features_ = estimator.X_.shape[1]
+        self.address_ = None
+        self._server = self._loop = self._thread = None
+        #queue of requests, batcher only runs while serving
+        self._pending, self._ready, self._batcher_task = deque(), None, None
+        #counters and windows of metrics
+        self._counts = {'requests': 0, 'rows': 0, 'batches': 0, 'errors': 0, 'max_queue_rows': 0}
+        self._predict_s = 0.0
+        self._latency = deque(maxlen=n_window)
+        self._wait = deque(maxlen=n_window)
+        self._batch_rows = deque(maxlen=n_window)
+        self._pending_rows = 0
+
+    async def predict(self, X):
+        """
+        Queues measurements `X`, of shape (n_features,) or (n_rows,
+        n_features), for next micro-batch.  Coroutine of serving event
+        loop, e.g., for in-process callers.
+
+        __Returns__
+
+        > Estimated target(s) of rows of `X`
+        """
+        return await self._enqueue(X)
+
+    def _enqueue(self, X):
+        """Validates and queues measurements `X`, returns future of their
+        estimates"""
+        if self._batcher_task is None:
+            raise RuntimeError('server is not serving, call serve, start or run first')
+        #rows of other widths (also ragged rows) are rejected before queueing
+        try:
+            X = np.asarray(X, dtype=np.float64)
+        except (TypeError, ValueError):
+            raise ValueError("rows of X must each have {:d} measurements".format(self.n_features_))
+        if X.ndim == 1:
+            X = X[np.newaxis]
+        if (X.ndim != 2) or (X.shape[0] == 0) or (X.shape[1] != self.n_features_):
+            raise ValueError("X must have shape (n_rows, {:d}), got {}".format(self.n_features_, X.shape))
+        future = _running_loop().create_future()
+        self._pending.append((X, future, time.perf_counter()))
+        self._pending_rows += X.shape[0]
+        self._counts['max_queue_rows'] = max(self._counts['max_queue_rows'], self._pending_rows)
+        #wake batcher on first request and once a batch is full
+        if (len(self._pending) == 1) or (self._pending_rows >= self.max_batch):
+            self._ready.set()
+        return future
+
+    async def _batcher(self):
+        """Dispatches queued requests as micro-batches, one at a time.  A
+        failing batch fails its requests and is logged, later batches are
+        still dispatched."""
+        while True:
+            await self._ready.wait()
+            batch = []
+            try:
+                if self._pending:
+                    #wait for more requests until batch is full or deadline of oldest
+                    wait = self._pending[0][2] + self.max_delay - time.perf_counter()
+                    if (self._pending_rows < self.max_batch) and (wait > 0):
+                        self._ready.clear()
+                        try:
+                            await asyncio.wait_for(self._ready.wait(), wait)
+                        except asyncio.TimeoutError:
+                            pass
+                #take requests up to max_batch rows, at least one
+                n_rows = 0
+                while self._pending and ((not batch) or (n_rows + self._pending[0][0].shape[0] <= self.max_batch)):
+                    batch.append(self._pending.popleft())
+                    n_rows += batch[-1][0].shape[0]
+                self._pending_rows -= n_rows
+                if not self._pending:
+                    self._ready.clear()
+                if batch:
+                    await self._run_batch(batch, n_rows)
+            except asyncio.CancelledError:
+                raise
+            except Exception as exc:
+                _logger.exception('micro-batch of %d requests failed', len(batch))
+                self._counts['errors'] += len(batch)
+                for _, future, _ in batch:
+                    if not future.done():
+                        future.set_exception(exc)
+            if self._pending:
+                self._ready.set()
+
+    async def _run_batch(self, batch, n_rows):
+        """Predicts rows of `batch` of requests at once in worker thread
+        and resolves request futures with their rows of estimates"""
+        X = batch[0][0] if len(batch) == 1 else np.concatenate([item[0] for item in batch])
+        t_start = time.perf_counter()
+        try:
+            y = await _running_loop().run_in_executor(self._executor, self.estimator.predict, X)
+        except Exception as exc:
+            self._counts['errors'] += len(batch)
+            for _, future, _ in batch:
+                if not future.done():
+                    future.set_exception(exc)
+            return
+        t_end = time.perf_counter()
+        #update metrics, return rows of each request (skip cancelled)
+        self._counts['requests'] += len(batch)
+        self._counts['rows'] += n_rows
+        self._counts['batches'] += 1
+        self._predict_s += t_end - t_start
+        self._batch_rows.append(n_rows)
+        start = 0
+        for X_request, future, t_request in batch:
+            self._wait.append(t_start - t_request)
+            self._latency.append(t_end - t_request)
+            if not future.done():
+                future.set_result(y[start:start+X_request.shape[0]])
+            start += X_request.shape[0]
+
+    def metrics(self):
+        """
+        Serving metrics, counts since start and percentiles over last
+        `n_window` requests (latency, queue wait) or batches (rows).
+
+        __Returns__
+
+        > dictionary of 'requests', 'rows', 'batches', 'errors' (requests
+        > of batches where predict failed), 'queue_rows' (rows waiting),
+        > 'max_queue_rows', 'predict_s' (total seconds of predict),
+        > 'batch_rows_mean', 'batch_rows_p50', 'batch_rows_max',
+        > 'latency_ms_p50', 'latency_ms_p99', 'wait_ms_p50' and 'wait_ms_p99'
+        """
+        metrics = dict(self._counts, queue_rows=self._pending_rows, predict_s=self._predict_s)
+        batch_rows = np.array(self._batch_rows)
+        latency, wait = 1e3*np.array(self._latency), 1e3*np.array(self._wait)
+        if batch_rows.size:
+            metrics.update(batch_rows_mean=float(batch_rows.mean()), batch_rows_p50=float(np.percentile(batch_rows, 50)),
+                           batch_rows_max=int(batch_rows.max()))
+        if latency.size:
+            metrics.update(latency_ms_p50=float(np.percentile(latency, 50)), latency_ms_p99=float(np.percentile(latency, 99)),
+                           wait_ms_p50=float(np.percentile(wait, 50)), wait_ms_p99=float(np.percentile(wait, 99)))
+        return metrics
+
+    async def _answer(self, body):
+        """Returns response (dictionary) and HTTP status of JSON request
+        `body`, malformed requests are answered before queueing"""
+        request_id = None
+        try:
+            request = json.loads(body)
+            if isinstance(request, dict):
+                request_id = request.get('id')
+                if request.get('metrics'):
+                    return self.metrics(), '200 OK'
+                request = request['X']
+            future = self._enqueue(request)
+        except Exception as exc:
+            return {'id': request_id, 'error': '{}: {}'.format(type(exc).__name__, exc)}, '400 Bad Request'
+        try:
+            y = await future
+        except Exception as exc:
+            return {'id': request_id, 'error': '{}: {}'.format(type(exc).__name__, exc)}, '500 Internal Server Error'
+        return {'id': request_id, 'y': y.tolist()}, '200 OK'
+
+    async def _handle_lines(self, reader, writer):
+        """Answers lines of JSON requests of a connection, concurrently
+        (responses are written in order of completion)"""
+        async def answer(line):
+            response, _ = await self._answer(line)
+            writer.write(json.dumps(response).encode() + b'\n')
+        tasks = set()
+        self._writers.add(writer)
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                tasks = {task for task in tasks if not task.done()}
+                tasks.add(asyncio.ensure_future(answer(line)))
+            if tasks:
+                await asyncio.wait(tasks)
+        except ConnectionError:
+            pass
+        finally:
+            self._writers.discard(writer)
+            writer.close()
+
+    async def _handle_http(self, reader, writer):
+        """Answers HTTP/1.1 requests (keep-alive) of a connection"""
+        self._writers.add(writer)
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line.strip():
+                    break
+                method, target = request_line.decode('latin-1').split()[:2]
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b'\r\n', b'\n', b''):
+                        break
+                    name, _, value = line.decode('latin-1').partition(':')
+                    headers[name.strip().lower()] = value.strip()
+                body = await reader.readexactly(int(headers.get('content-length', 0)))
+                if (method == 'POST') and (target == '/predict'):
+                    response, status = await self._answer(body)
+                elif (method == 'GET') and (target == '/metrics'):
+                    response, status = self.metrics(), '200 OK'
+                else:
+                    response, status = {'error': '{} {} not found'.format(method, target)}, '404 Not Found'
+                payload = json.dumps(response).encode()
+                writer.write('HTTP/1.1 {}\r\nContent-Type: application/json\r\nContent-Length: {:d}\r\n\r\n'.format(
+                    status, len(payload)).encode() + payload)
+                await writer.drain()
+                if headers.get('connection', '').lower() == 'close':
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError, ValueError):
+            pass
+        finally:
+            self._writers.discard(writer)
+            writer.close()
+
+    async def serve(self, path=None, host='127.0.0.1', port=8000):
+        """
+        Starts serving on current event loop, lines of JSON over Unix
+        socket `path` or, if None, HTTP on `host`:`port` (0 picks a free
+        port).  See also `start` and `run`.
+
+        __Returns__
+
+        > asyncio server, sets self.address_
+        """
+        self._pending.clear()
+        self._pending_rows, self._ready = 0, asyncio.Event()
+        self._writers = set()
+        self._executor = ThreadPoolExecutor(max_workers=1)
+        self._batcher_task = asyncio.ensure_future(self._batcher())
+        if path is not None:
+            self._server = await asyncio.start_unix_server(self._handle_lines, path=path)
+        else:
+            self._server = await asyncio.start_server(self._handle_http, host=host, port=port)
+        self.address_ = self._server.sockets[0].getsockname()
+        return self._server
+
+    async def close(self):
+        """Stops serving, closes open connections and cancels queued
+        requests"""
+        self._server.close()
+        for writer in list(self._writers):
+            writer.close()
+        await self._server.wait_closed()
+        self._batcher_task.cancel()
+        try:
+            await self._batcher_task
+        except asyncio.CancelledError:
+            pass
+        self._batcher_task = None
+        for _, future, _ in self._pending:
+            future.cancel()
+        self._pending.clear()
+        self._executor.shutdown(wait=True)
+        if isinstance(self.address_, str) and os.path.exists(self.address_):
+            os.remove(self.address_)
+
+    def start(self, path=None, host='127.0.0.1', port=8000):
+        """
+        Serves (see `serve`) from event loop of a background thread,
+        returns once listening.  Stop with `stop`.
+
+        __Returns__
+
+        > Self
+        """
+        self._loop = asyncio.new_event_loop()
+        started, errors = threading.Event(), []
+        def run():
+            asyncio.set_event_loop(self._loop)
+            try:
+                self._loop.run_until_complete(self.serve(path, host, port))
+            except Exception as exc:
+                errors.append(exc)
+                return
+            finally:
+                started.set()
+            self._loop.run_forever()
+        self._thread = threading.Thread(target=run, daemon=True)
+        self._thread.start()
+        started.wait()
+        if errors:
+            raise errors[0]
+        return self
+
+    def stop(self):
+        """Stops server of `start` and its thread"""
+        asyncio.run_coroutine_threadsafe(self.close(), self._loop).result()
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join()
+        self._loop.close()
+
+    def run(self, path=None, host='127.0.0.1', port=8000):
+        """Serves (see `serve`) from current thread until interrupted"""
+        loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(loop)
+        try:
+            loop.run_until_complete(self.serve(path, host, port))
+            try:
+                loop.run_forever()
+            except KeyboardInterrupt:
+                pass
+            finally:
+                loop.run_until_complete(self.close())
+        finally:
+            asyncio.set_event_loop(None)
+            loop.close()
\ No newline at end of file